@@ -54,7 +54,7 @@ async def main():
             # 执行任务
             async for result in engine.execute_task(task_query):
                 result_type = result.type
-                result_data = result.data
+                result_data = result.data_dict
                 
                 # 美化输出
                 if result_type == "task_analysis_started":
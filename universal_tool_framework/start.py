@@ -89,7 +89,7 @@ class UTFCli:
             
             async for result in self.engine.execute_task(task_query):
                 result_type = result.type
-                result_data = result.data
+                result_data = result.data_dict
                 
                 if result_type == "complexity_analysis_completed":
                     complexity = result_data
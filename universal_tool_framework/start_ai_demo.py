@@ -174,7 +174,7 @@ class AIIntelligenceCLI:
         try:
             async for result in self.engine.execute_task(user_query):
                 result_type = result.type
-                result_data = result.data
+                result_data = result.data_dict
                 
                 if result_type == "task_analysis_started":
                     print("🔍 AI开始智能分析任务...")
@@ -425,7 +425,7 @@ class AIIntelligenceCLI:
     async def display_task_result(self, result):
         """显示任务结果（简化版）"""
         result_type = result.type
-        result_data = result.data
+        result_data = result.data_dict
         
         if result_type == "task_resumed":
             progress = result_data.get('progress', 0)
@@ -358,7 +358,7 @@ class EnhancedUTFCli:
     async def display_task_result(self, result):
         """显示任务结果"""
         result_type = result.type
-        result_data = result.data
+        result_data = result.data_dict
         
         if result_type == "task_analysis_started":
             print("🔍 开始分析任务...")
@@ -38,8 +38,8 @@ async def test_claude_code_compliance():
                 print("   ✅ AI Agent启动成功")
             elif result.type == "complexity_analysis_completed":
                 ai_analysis_done = True
-                score = result.data.get('score', 0)
-                reasoning = result.data.get('reasoning', '')
+                score = result.data_dict.get('score', 0)
+                reasoning = result.data_dict.get('reasoning', '')
                 print(f"   ✅ AI智能分析: {score}/10 - {reasoning[:50]}...")
             elif result.type == "task_completed":
                 task_completed = True
@@ -59,7 +59,7 @@ async def test_claude_code_compliance():
         
         print("🎯 测试4: 工具生态系统")
         # 测试工具状态
-        available_tools = await engine.tool_lifecycle_manager.get_available_tools()
+        available_tools = engine.tool_lifecycle_manager.get_available_tools()
         print(f"   ✅ 可用工具: {len(available_tools)} 个")
         
         print("🎯 测试5: 事件驱动架构")
@@ -6,6 +6,9 @@
 import asyncio
 import sys
 import json
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # 添加项目路径
@@ -193,7 +196,7 @@ async def test_comprehensive_workflow():
                     phases["started"] = True
                 elif result.type == "complexity_analysis_completed":
                     phases["analysis"] = True
-                    score = result.data.get('score', 0)
+                    score = result.data_dict.get('score', 0)
                     print(f"   📊 AI评估: {score}/10")
                 elif result.type == "tool_execution_result":
                     phases["execution"] = True
@@ -223,6 +226,99 @@ async def test_comprehensive_workflow():
         except Exception as e:
             print(f"   💥 {test_name} 测试异常: {e}")
 
+async def test_state_database_migration():
+    """测试旧版本写入的状态数据库的迁移"""
+    print("\n🗄️ 测试状态数据库迁移")
+    print("-" * 40)
+    
+    from universal_tool_framework.utf.core.state_manager import DatabaseStateStorage
+    from universal_tool_framework.utf.models.task import Task
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = str(Path(temp_dir) / "legacy_state.db")
+        base_time = datetime(2024, 1, 1)
+        
+        # 按旧版本的表结构写入数据：ISO字符串时间，TodoList整体存储在todo_list_data中
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('''
+                CREATE TABLE tasks (
+                    id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    description TEXT,
+                    status TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    started_at TIMESTAMP,
+                    completed_at TIMESTAMP,
+                    complexity_data TEXT,
+                    todo_list_data TEXT,
+                    metadata_data TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            for i in range(3):
+                todo_list = [{
+                    "id": f"todo_{i}",
+                    "content": f"旧步骤{i}",
+                    "status": "pending",
+                    "created_at": base_time.isoformat(),
+                }]
+                conn.execute('''
+                    INSERT INTO tasks
+                    (id, query, description, status, created_at, started_at, completed_at,
+                     complexity_data, todo_list_data, metadata_data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    f"old{i}", "旧任务", "旧版本写入的任务", "pending",
+                    (base_time + timedelta(days=i * 2)).isoformat(), None, None,
+                    None, json.dumps(todo_list), json.dumps({})
+                ))
+        
+        print("1. 测试时间列迁移...")
+        try:
+            storage = DatabaseStateStorage(db_path)
+            with sqlite3.connect(db_path) as conn:
+                time_types = {row[0] for row in conn.execute("SELECT typeof(created_at) FROM tasks")}
+                user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+            assert time_types == {"integer"}, time_types
+            assert user_version == 1, user_version
+            
+            # 新旧行的created_at可以正确比较排序
+            await storage.save_task_state(Task(
+                id="new", query="新任务", description="迁移后写入的任务",
+                created_at=base_time + timedelta(days=3)
+            ))
+            task_ids = await storage.list_task_states()
+            assert task_ids == ["old2", "new", "old1", "old0"], task_ids
+            print("   ✅ 时间列已转换为整数，新旧任务排序正确")
+        except Exception as e:
+            print(f"   ❌ 时间列迁移失败: {e}")
+            return
+        
+        print("2. 测试TodoList迁移到todos表...")
+        try:
+            task = await storage.load_task_state("old1")
+            assert task.created_at == base_time + timedelta(days=2), task.created_at
+            assert [todo.id for todo in task.todo_list] == ["todo_1"], task.todo_list
+            
+            await storage.save_task_state(task)
+            with sqlite3.connect(db_path) as conn:
+                todo_ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM todos WHERE task_id = ?", ("old1",)
+                )]
+                legacy_data = conn.execute(
+                    "SELECT todo_list_data FROM tasks WHERE id = ?", ("old1",)
+                ).fetchone()[0]
+            assert todo_ids == ["todo_1"], todo_ids
+            assert legacy_data is None, legacy_data
+            
+            reloaded = await storage.load_task_state("old1")
+            assert [todo.content for todo in reloaded.todo_list] == ["旧步骤1"], reloaded.todo_list
+            print("   ✅ 旧TodoList已写入todos表，重新加载结果一致")
+        except Exception as e:
+            print(f"   ❌ TodoList迁移失败: {e}")
+        finally:
+            await storage.close()
+
 async def main():
     """主测试函数"""
     print("🧪 修复功能验证测试")
@@ -232,7 +328,8 @@ async def main():
         test_json_parsing_fix,
         test_async_generator_fix, 
         test_json_serialization_fix,
-        test_comprehensive_workflow
+        test_comprehensive_workflow,
+        test_state_database_migration
     ]
     
     for test_func in test_functions:
@@ -11,7 +11,7 @@ Universal Tool Framework (UTF)
 
 from .core.engine import UniversalTaskEngine
 from .config.settings import FrameworkConfig
-from .models.task import Task, TodoItem, TaskStatus, TaskResult
+from .models.task import Task, TodoItem, TaskStatus, TaskResult, TaskResultBatch
 from .models.tool import ToolResult, ToolCall
 from .tools.base import BaseTool
 
@@ -27,6 +27,7 @@ __all__ = [
     "TodoItem",
     "TaskStatus",
     "TaskResult",
+    "TaskResultBatch",
     "ToolResult",
     "ToolCall",
 ]
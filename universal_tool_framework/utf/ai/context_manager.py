@@ -128,7 +128,7 @@ class ContextManager:
     ) -> None:
         """添加任务结果到上下文"""
         
-        content = f"任务事件: {task_result.type}\n数据: {json.dumps(task_result.data, ensure_ascii=False, indent=2)}"
+        content = f"任务事件: {task_result.type}\n数据: {json.dumps(task_result.data_dict, ensure_ascii=False, indent=2)}"
         
         entry = ContextEntry(
             id=f"task_{task_result.type}_{int(time.time() * 1000)}",
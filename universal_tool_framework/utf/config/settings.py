@@ -67,6 +67,12 @@ class InteractionConfig(BaseModel):
     confirmation_required: bool = Field(default=False, description="需要用户确认")
     auto_continue_simple_tasks: bool = Field(default=True, description="简单任务自动继续")
     user_response_timeout: int = Field(default=300, description="用户响应超时(秒)")
+    batch_result_emissions: bool = Field(default=False, description="合并TodoList执行结果批量输出")
+    result_batch_size: int = Field(default=8, description="单个结果批次的最大结果数")
+    result_batch_interval: float = Field(default=0.005, description="结果批次的最长缓冲时间(秒)")
+    batch_notification_events: bool = Field(default=False, description="合并进度/通知事件批量分发")
+    notification_batch_size: int = Field(default=512, description="单个通知批次的最大事件数")
+    notification_batch_interval: float = Field(default=0.005, description="通知批次的最长缓冲时间(秒)")
 
 
 class TaskConfig(BaseModel):
@@ -79,6 +85,11 @@ class TaskConfig(BaseModel):
     max_retry_attempts: int = Field(default=3, description="最大重试次数")
 
 
+class CacheConfig(BaseModel):
+    """缓存配置"""
+    complexity_cache_size: int = Field(default=256, description="复杂度分析缓存条目数")
+
+
 class FrameworkConfig(BaseSettings):
     """框架主配置类"""
     
@@ -100,6 +111,7 @@ class FrameworkConfig(BaseSettings):
     logging: LoggingConfig = Field(default_factory=LoggingConfig, description="日志配置")
     interaction: InteractionConfig = Field(default_factory=InteractionConfig, description="交互配置")
     task: TaskConfig = Field(default_factory=TaskConfig, description="任务配置")
+    cache: CacheConfig = Field(default_factory=CacheConfig, description="缓存配置")
     
     # 扩展配置
     extensions: Dict[str, Any] = Field(default={}, description="扩展配置")
@@ -5,12 +5,12 @@ Universal Tool Framework 核心执行引擎
 """
 
 import asyncio
-import uuid
-from typing import AsyncGenerator, Optional, Dict, Any
+import time
+from typing import AsyncGenerator, Optional, Dict, Any, List, Union
 from datetime import datetime
 
 from ..config.settings import FrameworkConfig
-from ..models.task import Task, TodoItem, TaskStatus, TaskResult, TaskComplexity
+from ..models.task import Task, TodoItem, TaskStatus, TaskResult, TaskResultBatch, TaskComplexity
 from ..models.execution import ExecutionContext, UserInteractionEvent
 from ..core.task_decomposer import TaskDecomposer
 from ..core.tool_orchestrator import ToolOrchestrator
@@ -18,6 +18,7 @@ from ..core.interaction_manager import InteractionManager
 from ..core.error_recovery import get_error_recovery_manager
 from ..core.state_manager import get_state_manager
 from ..core.tool_lifecycle import get_tool_lifecycle_manager
+from ..utils.ids import new_id
 from ..utils.logging import get_logger
 from ..utils.metrics import get_performance_monitor
 from ..ai.llm_client import LLMClient, LLMConfig, LLMProvider
@@ -25,6 +26,20 @@ from ..ai.intelligent_planner import IntelligentPlanner
 from ..ai.context_manager import ContextManager
 
 
+# 未提供上下文时使用的只读空字典
+_EMPTY_CONTEXT: Dict[str, Any] = {}
+
+# 热路径上使用的常量别名
+_now = datetime.now
+_STATUS_IN_PROGRESS = TaskStatus.IN_PROGRESS
+_STATUS_CANCELLED = TaskStatus.CANCELLED
+_STATUS_COMPLETED = TaskStatus.COMPLETED
+_RESUMABLE_STATUSES = frozenset((TaskStatus.IN_PROGRESS, TaskStatus.PENDING))
+
+# 批量输出时需要立即送达消费者的结果类型（消费者必须先看到才能响应）
+_IMMEDIATE_RESULT_TYPES = frozenset(("user_interaction_required",))
+
+
 class UniversalTaskEngine:
     """
     通用任务执行引擎
@@ -99,7 +114,7 @@ class UniversalTaskEngine:
         self, 
         user_query: str,
         context: Optional[Dict[str, Any]] = None
-    ) -> AsyncGenerator[TaskResult, None]:
+    ) -> AsyncGenerator[Union[TaskResult, TaskResultBatch], None]:
         """
         执行任务的主入口
         
@@ -108,10 +123,13 @@ class UniversalTaskEngine:
             context: 可选的执行上下文
             
         Yields:
-            TaskResult: 任务执行结果流
+            TaskResult: 任务执行结果流；启用interaction.batch_result_emissions时，
+                TodoList执行阶段的结果以TaskResultBatch批量输出
         """
-        task_id = str(uuid.uuid4())
-        session_id = context.get('session_id', str(uuid.uuid4())) if context else str(uuid.uuid4())
+        task_id = new_id()
+        session_id = context.get('session_id') if context else None
+        if session_id is None:
+            session_id = new_id()
         
         self.logger.info(f"开始执行任务: {task_id}")
         
@@ -188,7 +206,9 @@ class UniversalTaskEngine:
                 )
                 
                 # 执行TodoList
-                async for result in self._execute_todo_list(task, execution_context):
+                async for result in self._maybe_batch_results(
+                    self._execute_todo_list(task, execution_context)
+                ):
                     yield result
             else:
                 # 简单任务：直接执行
@@ -208,7 +228,7 @@ class UniversalTaskEngine:
                     "task_id": task_id,
                     "status": task.status.value,
                     "progress": task.progress_percentage,
-                    "duration": (datetime.now() - task.created_at).total_seconds(),
+                    "duration": (_now() - task.created_at).total_seconds(),
                     "ai_summary": completion_message
                 },
                 task_id=task_id
@@ -260,24 +280,22 @@ class UniversalTaskEngine:
         3. 智能工具选择和执行
         4. 实时进度反馈
         """
-        task.started_at = datetime.now()
-        task.status = TaskStatus.IN_PROGRESS
+        task.started_at = _now()
+        task.status = _STATUS_IN_PROGRESS
+        
+        # 构建就绪队列，后续按依赖完成情况增量入队
+        task.init_ready_queue()
         
         while True:
-            # 获取可执行的TodoItem
-            ready_todos = task.get_ready_todos()
+            # 获取优先级最高的可执行TodoItem
+            current_todo = task.pop_ready_todo()
             
-            if not ready_todos:
+            if current_todo is None:
                 # 检查是否还有未完成的依赖
                 if task.pending_todos:
                     self.logger.warning(f"存在无法执行的TodoItem，可能存在循环依赖")
-                    break
-                else:
-                    # 所有TodoItem都已完成
-                    break
-            
-            # 选择下一个执行的TodoItem
-            current_todo = ready_todos[0]  # 按优先级排序后的第一个
+                # 否则所有TodoItem都已完成
+                break
             
             yield TaskResult(
                 type="todo_started",
@@ -296,7 +314,9 @@ class UniversalTaskEngine:
                 if interruption_check:
                     async for result in self._handle_user_interruption(task, current_todo, context):
                         yield result
-                    continue  # 重新开始循环
+                    # TodoList可能已被修改，重建就绪队列后重新开始循环
+                    task.init_ready_queue()
+                    continue
             
             # 执行TodoItem
             current_todo.mark_started()
@@ -305,7 +325,7 @@ class UniversalTaskEngine:
                 async for result in self._execute_todo_item(current_todo, task, context):
                     yield result
                 
-                current_todo.mark_completed()
+                task.complete_todo(current_todo)
                 
                 yield TaskResult(
                     type="todo_completed",
@@ -336,6 +356,63 @@ class UniversalTaskEngine:
                 if not self.config.task.retry_failed_todos:
                     break
     
+    async def _maybe_batch_results(
+        self,
+        results: AsyncGenerator[TaskResult, None]
+    ) -> AsyncGenerator[Union[TaskResult, TaskResultBatch], None]:
+        """按配置将连续的结果合并为TaskResultBatch输出，减少生成器切换次数"""
+        interaction_config = self.config.interaction
+        if not interaction_config.batch_result_emissions:
+            async for result in results:
+                yield result
+            return
+        
+        batch_size = interaction_config.result_batch_size
+        batch_interval = interaction_config.result_batch_interval
+        buffer: List[TaskResult] = []
+        deadline = 0.0
+        # 缓冲区非空时，上游的下一步在独立任务中推进，超时只停止等待而不会取消上游生成器
+        pending: Optional[asyncio.Future] = None
+        
+        try:
+            while True:
+                if buffer:
+                    if pending is None:
+                        pending = asyncio.ensure_future(results.__anext__())
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        await asyncio.wait((pending,), timeout=remaining)
+                    if not pending.done():
+                        # 缓冲时间已到而上游尚未产出新结果，先输出已缓冲的结果
+                        yield TaskResultBatch(results=buffer)
+                        buffer = []
+                        continue
+                
+                next_result = pending if pending is not None else results.__anext__()
+                pending = None
+                try:
+                    result = await next_result
+                except StopAsyncIteration:
+                    break
+                
+                if not buffer:
+                    deadline = time.monotonic() + batch_interval
+                buffer.append(result)
+                
+                if (
+                    result.type in _IMMEDIATE_RESULT_TYPES
+                    or len(buffer) >= batch_size
+                    or time.monotonic() >= deadline
+                ):
+                    yield TaskResultBatch(results=buffer)
+                    buffer = []
+            
+            if buffer:
+                yield TaskResultBatch(results=buffer)
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
     async def _execute_todo_item(
         self,
         todo: TodoItem,
@@ -360,12 +437,12 @@ class UniversalTaskEngine:
     ) -> AsyncGenerator[TaskResult, None]:
         """执行简单任务"""
         
-        task.started_at = datetime.now()
-        task.status = TaskStatus.IN_PROGRESS
+        task.started_at = _now()
+        task.status = _STATUS_IN_PROGRESS
         
         # 创建单个TodoItem
         simple_todo = TodoItem(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             content=task.description,
             tools_needed=[]  # 将由工具编排器动态选择
         )
@@ -397,7 +474,7 @@ class UniversalTaskEngine:
         
         # 创建交互事件
         interaction_event = UserInteractionEvent(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             type="interruption_options",
             data={
                 "options": [
@@ -414,7 +491,7 @@ class UniversalTaskEngine:
         
         yield TaskResult(
             type="user_interaction_required",
-            data=interaction_event.model_dump(),
+            data=interaction_event,
             task_id=task.id
         )
         
@@ -427,7 +504,7 @@ class UniversalTaskEngine:
         if response:
             yield TaskResult(
                 type="user_interaction_response",
-                data=response.model_dump(),
+                data=response,
                 task_id=task.id
             )
             
@@ -446,7 +523,7 @@ class UniversalTaskEngine:
                     task_id=task.id
                 )
             elif response.action == "abort":
-                task.status = TaskStatus.CANCELLED
+                task.status = _STATUS_CANCELLED
                 
                 yield TaskResult(
                     type="task_aborted",
@@ -461,17 +538,18 @@ class UniversalTaskEngine:
         context: Optional[Dict[str, Any]]
     ) -> ExecutionContext:
         """创建执行上下文"""
+        ctx = context if context is not None else _EMPTY_CONTEXT
         
         return ExecutionContext(
             session_id=session_id,
             task_id=task_id,
-            user_id=context.get('user_id') if context else None,
-            working_directory=context.get('working_directory') if context else None,
-            environment_variables=context.get('environment', {}) if context else {},
-            permissions=context.get('permissions', []) if context else [],
+            user_id=ctx.get('user_id'),
+            working_directory=ctx.get('working_directory'),
+            environment_variables=ctx.get('environment', {}),
+            permissions=ctx.get('permissions', []),
             max_execution_time=self.config.security.max_execution_time,
-            allow_network_access=context.get('allow_network', True) if context else True,
-            allow_file_write=context.get('allow_file_write', True) if context else True
+            allow_network_access=ctx.get('allow_network', True),
+            allow_file_write=ctx.get('allow_file_write', True)
         )
     
     def _cleanup_task(self, task_id: str) -> None:
@@ -488,6 +566,9 @@ class UniversalTaskEngine:
         # 清理交互资源
         self.interaction_manager.cleanup_task_interactions(task_id)
         
+        # 清理错误恢复历史
+        self.error_recovery_manager.clear_task_history(task_id)
+        
         # 记录性能指标
         self.performance_monitor.record_concurrency_metrics(
             active_tasks=len(self._active_tasks),
@@ -514,13 +595,16 @@ class UniversalTaskEngine:
         """取消任务"""
         task = self._active_tasks.get(task_id)
         if task:
-            task.status = TaskStatus.CANCELLED
+            task.status = _STATUS_CANCELLED
             self._cleanup_task(task_id)
             self.logger.info(f"任务已取消: {task_id}")
             return True
         return False
     
-    async def resume_task(self, task_id: str) -> AsyncGenerator[TaskResult, None]:
+    async def resume_task(
+        self,
+        task_id: str
+    ) -> AsyncGenerator[Union[TaskResult, TaskResultBatch], None]:
         """恢复任务执行"""
         # 从状态管理器加载任务
         task = await self.state_manager.load_task(task_id)
@@ -536,7 +620,7 @@ class UniversalTaskEngine:
             return
         
         # 检查任务是否可以恢复
-        if task.status not in [TaskStatus.IN_PROGRESS, TaskStatus.PENDING]:
+        if task.status not in _RESUMABLE_STATUSES:
             yield TaskResult(
                 type="task_resume_failed",
                 data={
@@ -569,13 +653,15 @@ class UniversalTaskEngine:
         try:
             # 继续执行未完成的TodoList
             if task.todo_list:
-                async for result in self._execute_todo_list(task, execution_context):
+                async for result in self._maybe_batch_results(
+                    self._execute_todo_list(task, execution_context)
+                ):
                     yield result
             
             # 更新任务状态
             task.update_status()
             
-            if task.status == TaskStatus.COMPLETED:
+            if task.status == _STATUS_COMPLETED:
                 yield TaskResult(
                     type="task_completed",
                     data={
@@ -612,7 +698,7 @@ class UniversalTaskEngine:
 执行概况：
 - 总步骤数：{len(task.todo_list)}
 - 完成步骤：{len(task.completed_todos)}
-- 执行时间：{(datetime.now() - task.created_at).total_seconds():.1f}秒
+- 执行时间：{(_now() - task.created_at).total_seconds():.1f}秒
 - 完成率：{task.progress_percentage:.1f}%
 
 请生成一个简洁友好的完成总结，包括：
@@ -646,7 +732,7 @@ class UniversalTaskEngine:
             "error_recovery": self.error_recovery_manager.get_recovery_statistics(),
             "performance": self.performance_monitor.get_performance_report(hours=1),
             "tool_lifecycle": self.tool_lifecycle_manager.get_lifecycle_statistics(),
-            "available_tools": await self.tool_lifecycle_manager.get_available_tools(),
+            "available_tools": self.tool_lifecycle_manager.get_available_tools(),
             "ai_status": {
                 "llm_provider": self.llm_client.get_provider().value,
                 "llm_model": self.llm_client.get_model(),
@@ -7,14 +7,17 @@
 import asyncio
 import time
 import traceback
+from collections import deque
+from functools import lru_cache
 from enum import Enum
-from typing import Dict, List, Optional, Any, Callable, Union
+from typing import Awaitable, Deque, Dict, List, Optional, Any, Callable, Set, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from ..models.task import Task, TodoItem, TaskStatus
 from ..models.tool import ToolResult
 from ..utils.logging import get_logger
+from ..utils.dataclass_ext import DATACLASS_SLOTS
 
 
 class ErrorType(Enum):
@@ -29,6 +32,23 @@ class ErrorType(Enum):
     UNKNOWN_ERROR = "unknown_error"
 
 
+# 重试退避参数
+_BACKOFF_BASE_DELAY = 1.0
+_BACKOFF_MAX_DELAY = 30.0
+_BACKOFF_FACTOR = 1.5
+
+
+@lru_cache(maxsize=64)
+def _compute_backoff_delay(attempt_count: int) -> float:
+    """计算第attempt_count次尝试的退避延迟（秒）"""
+    delay = _BACKOFF_BASE_DELAY * (_BACKOFF_FACTOR ** (attempt_count - 1))
+    return min(delay, _BACKOFF_MAX_DELAY)
+
+
+# 预计算常见尝试次数(0-15)的退避延迟，按尝试次数直接索引
+_BACKOFF_DELAYS = tuple(_compute_backoff_delay(attempt) for attempt in range(16))
+
+
 class RecoveryStrategy(Enum):
     """恢复策略枚举"""
     RETRY = "retry"              # 重试
@@ -38,11 +58,11 @@ class RecoveryStrategy(Enum):
     MANUAL = "manual"            # 手动处理
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ErrorPattern:
     """错误模式定义"""
     error_type: ErrorType
-    keywords: List[str]
+    keywords: Tuple[str, ...]
     recovery_strategy: RecoveryStrategy
     max_retries: int = 3
     backoff_factor: float = 1.5
@@ -50,7 +70,64 @@ class ErrorPattern:
     fallback_action: Optional[str] = None
 
 
-@dataclass
+# 默认错误模式（只读，所有实例共享）
+_DEFAULT_ERROR_PATTERNS: Tuple[ErrorPattern, ...] = (
+    ErrorPattern(
+        error_type=ErrorType.TIMEOUT_ERROR,
+        keywords=('timeout', 'timed out', '超时'),
+        recovery_strategy=RecoveryStrategy.RETRY,
+        max_retries=3,
+        backoff_factor=2.0
+    ),
+    ErrorPattern(
+        error_type=ErrorType.NETWORK_ERROR,
+        keywords=('connection', 'network', 'unreachable', '网络'),
+        recovery_strategy=RecoveryStrategy.RETRY,
+        max_retries=2,
+        backoff_factor=1.5
+    ),
+    ErrorPattern(
+        error_type=ErrorType.PERMISSION_ERROR,
+        keywords=('permission', 'access denied', 'forbidden', '权限'),
+        recovery_strategy=RecoveryStrategy.MANUAL,
+        max_retries=1
+    ),
+    ErrorPattern(
+        error_type=ErrorType.FILE_ERROR,
+        keywords=('file not found', 'no such file', '文件不存在'),
+        recovery_strategy=RecoveryStrategy.FALLBACK,
+        max_retries=1,
+        fallback_action='create_default_file'
+    ),
+    ErrorPattern(
+        error_type=ErrorType.VALIDATION_ERROR,
+        keywords=('validation', 'invalid', '无效', '验证失败'),
+        recovery_strategy=RecoveryStrategy.ABORT,
+        max_retries=0
+    ),
+)
+
+
+# 熔断器状态
+CIRCUIT_CLOSED = 0
+CIRCUIT_OPEN = 1
+CIRCUIT_HALF_OPEN = 2
+
+
+class CircuitState:
+    """熔断器状态（使用__slots__，避免每个工具一个dict）"""
+    
+    __slots__ = ('failure_count', 'last_failure_time', 'state', 'threshold', 'timeout')
+    
+    def __init__(self, threshold: int = 5, timeout: float = 60.0):
+        self.failure_count = 0
+        self.last_failure_time = 0.0  # time.monotonic() 时间戳，0表示从未失败
+        self.state = CIRCUIT_CLOSED
+        self.threshold = threshold
+        self.timeout = timeout  # 秒
+
+
+@dataclass(**DATACLASS_SLOTS)
 class RecoveryContext:
     """恢复上下文"""
     task_id: str
@@ -71,14 +148,23 @@ class ErrorRecoveryManager:
     提供智能的错误分类、恢复策略选择和执行
     """
     
-    def __init__(self):
+    def __init__(self, history_per_task: int = 64):
         self.logger = get_logger(__name__)
         
         # 错误模式库
         self._error_patterns = self._init_error_patterns()
         
-        # 恢复历史记录
-        self._recovery_history: Dict[str, List[RecoveryContext]] = {}
+        # 异常类型 -> 错误类型 分派表
+        self._exception_error_types = self._init_exception_error_types()
+        
+        # 错误模式在构造后不再变化，据此预先生成专用的分类函数
+        self._error_classifier = self._build_error_classifier(
+            self._error_patterns, self._exception_error_types
+        )
+        
+        # 恢复历史记录（每个任务一个定长环形缓冲区）
+        self._history_per_task = history_per_task
+        self._recovery_history: Dict[str, Deque[RecoveryContext]] = {}
         
         # 错误统计
         self._error_stats = {
@@ -90,7 +176,22 @@ class ErrorRecoveryManager:
         }
         
         # 熔断器状态
-        self._circuit_breakers: Dict[str, Dict[str, Any]] = {}
+        self._circuit_breakers: Dict[str, CircuitState] = {}
+        
+        # 重试等待的唤醒事件（熔断器状态变化时提前结束等待）
+        # 每次等待在自身协程内创建事件并在结束时移除，避免事件绑定到其他事件循环
+        self._wake_events: Dict[str, Set[asyncio.Event]] = {}
+        
+        # 恢复策略分派表
+        self._strategy_handlers: Dict[
+            RecoveryStrategy, Callable[[RecoveryContext], Awaitable[Dict[str, Any]]]
+        ] = {
+            RecoveryStrategy.RETRY: self._handle_retry,
+            RecoveryStrategy.FALLBACK: self._handle_fallback,
+            RecoveryStrategy.SKIP: self._handle_skip,
+            RecoveryStrategy.ABORT: self._handle_abort,
+            RecoveryStrategy.MANUAL: self._handle_manual,
+        }
         
         self.logger.info("ErrorRecoveryManager initialized")
     
@@ -153,32 +254,8 @@ class ErrorRecoveryManager:
         return recovery_result
     
     def _classify_error(self, error: Exception) -> ErrorType:
-        """分类错误类型"""
-        error_message = str(error).lower()
-        error_type_name = type(error).__name__.lower()
-        
-        # 根据异常类型分类
-        if isinstance(error, TimeoutError) or 'timeout' in error_message:
-            return ErrorType.TIMEOUT_ERROR
-        
-        elif isinstance(error, PermissionError) or 'permission' in error_message:
-            return ErrorType.PERMISSION_ERROR
-        
-        elif isinstance(error, (FileNotFoundError, IsADirectoryError, OSError)):
-            return ErrorType.FILE_ERROR
-        
-        elif isinstance(error, (ConnectionError, TimeoutError)) or 'network' in error_message:
-            return ErrorType.NETWORK_ERROR
-        
-        elif 'validation' in error_message or 'invalid' in error_message:
-            return ErrorType.VALIDATION_ERROR
-        
-        # 根据错误模式匹配
-        for pattern in self._error_patterns:
-            if any(keyword in error_message for keyword in pattern.keywords):
-                return pattern.error_type
-        
-        return ErrorType.UNKNOWN_ERROR
+        """分类错误类型（委托给构造时由 _build_error_classifier 生成的专用函数）"""
+        return self._error_classifier(error)
     
     def _select_recovery_strategy(self, context: RecoveryContext) -> RecoveryStrategy:
         """选择恢复策略"""
@@ -214,27 +291,15 @@ class ErrorRecoveryManager:
             f"尝试次数: {context.attempt_count}"
         )
         
-        if strategy == RecoveryStrategy.RETRY:
-            return await self._handle_retry(context)
-        
-        elif strategy == RecoveryStrategy.FALLBACK:
-            return await self._handle_fallback(context)
-        
-        elif strategy == RecoveryStrategy.SKIP:
-            return await self._handle_skip(context)
-        
-        elif strategy == RecoveryStrategy.ABORT:
-            return await self._handle_abort(context)
-        
-        elif strategy == RecoveryStrategy.MANUAL:
-            return await self._handle_manual(context)
-        
-        else:
+        handler = self._strategy_handlers.get(strategy)
+        if handler is None:
             return {
                 'action': 'unknown_strategy',
                 'success': False,
                 'message': f"未知的恢复策略: {strategy}"
             }
+        
+        return await handler(context)
     
     async def _handle_retry(self, context: RecoveryContext) -> Dict[str, Any]:
         """处理重试策略"""
@@ -249,7 +314,27 @@ class ErrorRecoveryManager:
         )
         
         if delay > 0:
-            await asyncio.sleep(delay)
+            wake_event = asyncio.Event()
+            waiters = self._wake_events.setdefault(context.tool_name, set())
+            waiters.add(wake_event)
+            try:
+                await asyncio.wait_for(wake_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                waiters.discard(wake_event)
+                if not waiters and self._wake_events.get(context.tool_name) is waiters:
+                    del self._wake_events[context.tool_name]
+            
+            # 等待期间熔断器已开启，不再重试
+            circuit = self._circuit_breakers.get(context.tool_name)
+            if circuit is not None and circuit.state == CIRCUIT_OPEN:
+                return {
+                    'action': 'circuit_breaker_open',
+                    'success': False,
+                    'message': f"熔断器开启，停止执行 {context.tool_name}",
+                    'should_continue': False
+                }
         
         return {
             'action': 'retry',
@@ -320,47 +405,38 @@ class ErrorRecoveryManager:
     
     def _calculate_backoff_delay(self, attempt_count: int) -> float:
         """计算退避延迟时间"""
-        base_delay = 1.0
-        max_delay = 30.0
-        backoff_factor = 1.5
-        
-        delay = base_delay * (backoff_factor ** (attempt_count - 1))
-        return min(delay, max_delay)
+        if 0 <= attempt_count < len(_BACKOFF_DELAYS):
+            return _BACKOFF_DELAYS[attempt_count]
+        if attempt_count > 0:
+            return _BACKOFF_MAX_DELAY
+        return _compute_backoff_delay(attempt_count)
     
     async def _check_circuit_breaker(self, context: RecoveryContext) -> bool:
         """检查熔断器状态"""
         tool_name = context.tool_name
         
-        if tool_name not in self._circuit_breakers:
-            self._circuit_breakers[tool_name] = {
-                'failure_count': 0,
-                'last_failure_time': None,
-                'state': 'closed',  # closed, open, half_open
-                'threshold': 5,
-                'timeout': 60  # 秒
-            }
-        
-        circuit = self._circuit_breakers[tool_name]
+        circuit = self._circuit_breakers.get(tool_name)
+        if circuit is None:
+            circuit = self._circuit_breakers[tool_name] = CircuitState()
         
         # 更新失败计数
-        circuit['failure_count'] += 1
-        circuit['last_failure_time'] = datetime.now()
+        now = time.monotonic()
+        circuit.failure_count += 1
+        circuit.last_failure_time = now
         
         # 检查是否需要开启熔断器
-        if circuit['failure_count'] >= circuit['threshold']:
-            if circuit['state'] == 'closed':
-                circuit['state'] = 'open'
-                self.logger.warning(f"熔断器开启: {tool_name}")
-                return True
+        if circuit.failure_count >= circuit.threshold and circuit.state == CIRCUIT_CLOSED:
+            circuit.state = CIRCUIT_OPEN
+            self.logger.warning(f"熔断器开启: {tool_name}")
+            self._wake_retry_waiters(tool_name)
+            return True
         
         # 检查是否可以半开
-        if circuit['state'] == 'open':
-            if circuit['last_failure_time']:
-                elapsed = (datetime.now() - circuit['last_failure_time']).total_seconds()
-                if elapsed >= circuit['timeout']:
-                    circuit['state'] = 'half_open'
-                    self.logger.info(f"熔断器半开: {tool_name}")
-                    return False
+        if circuit.state == CIRCUIT_OPEN:
+            if now - circuit.last_failure_time >= circuit.timeout:
+                circuit.state = CIRCUIT_HALF_OPEN
+                self.logger.info(f"熔断器半开: {tool_name}")
+                return False
             return True
         
         return False
@@ -369,10 +445,11 @@ class ErrorRecoveryManager:
         """记录错误信息"""
         task_id = context.task_id
         
-        if task_id not in self._recovery_history:
-            self._recovery_history[task_id] = []
+        history = self._recovery_history.get(task_id)
+        if history is None:
+            history = self._recovery_history[task_id] = deque(maxlen=self._history_per_task)
         
-        self._recovery_history[task_id].append(context)
+        history.append(context)
         
         # 更新错误类型统计
         error_type = context.error_type.value
@@ -421,43 +498,74 @@ class ErrorRecoveryManager:
         
         return suggestions
     
-    def _init_error_patterns(self) -> List[ErrorPattern]:
+    def _init_error_patterns(self) -> Tuple[ErrorPattern, ...]:
         """初始化错误模式"""
-        return [
-            ErrorPattern(
-                error_type=ErrorType.TIMEOUT_ERROR,
-                keywords=['timeout', 'timed out', '超时'],
-                recovery_strategy=RecoveryStrategy.RETRY,
-                max_retries=3,
-                backoff_factor=2.0
-            ),
-            ErrorPattern(
-                error_type=ErrorType.NETWORK_ERROR,
-                keywords=['connection', 'network', 'unreachable', '网络'],
-                recovery_strategy=RecoveryStrategy.RETRY,
-                max_retries=2,
-                backoff_factor=1.5
-            ),
-            ErrorPattern(
-                error_type=ErrorType.PERMISSION_ERROR,
-                keywords=['permission', 'access denied', 'forbidden', '权限'],
-                recovery_strategy=RecoveryStrategy.MANUAL,
-                max_retries=1
-            ),
-            ErrorPattern(
-                error_type=ErrorType.FILE_ERROR,
-                keywords=['file not found', 'no such file', '文件不存在'],
-                recovery_strategy=RecoveryStrategy.FALLBACK,
-                max_retries=1,
-                fallback_action='create_default_file'
-            ),
-            ErrorPattern(
-                error_type=ErrorType.VALIDATION_ERROR,
-                keywords=['validation', 'invalid', '无效', '验证失败'],
-                recovery_strategy=RecoveryStrategy.ABORT,
-                max_retries=0
-            )
+        return _DEFAULT_ERROR_PATTERNS
+    
+    def _init_exception_error_types(self) -> Dict[type, ErrorType]:
+        """初始化异常类型到错误类型的映射"""
+        return {
+            TimeoutError: ErrorType.TIMEOUT_ERROR,
+            asyncio.TimeoutError: ErrorType.TIMEOUT_ERROR,
+            PermissionError: ErrorType.PERMISSION_ERROR,
+            ConnectionError: ErrorType.NETWORK_ERROR,
+            FileNotFoundError: ErrorType.FILE_ERROR,
+            IsADirectoryError: ErrorType.FILE_ERROR,
+            OSError: ErrorType.FILE_ERROR,
+        }
+    
+    @staticmethod
+    def _build_error_classifier(
+        patterns: Tuple[ErrorPattern, ...],
+        exception_error_types: Dict[type, ErrorType]
+    ) -> Callable[[Exception], ErrorType]:
+        """根据错误模式生成内联了全部关键词判断的分类函数"""
+        lines = [
+            "def classify(error):",
+            "    error_message = str(error).lower()",
+            # 沿MRO查找异常类型，命中第一个即返回
+            "    exception_error_type = None",
+            "    for cls in type(error).__mro__:",
+            "        exception_error_type = exception_error_types_get(cls)",
+            "        if exception_error_type is not None:",
+            "            break",
+            # 超时和权限关键词的优先级高于一般的OSError分类
+            "    if exception_error_type is TIMEOUT_ERROR or 'timeout' in error_message:",
+            "        return TIMEOUT_ERROR",
+            "    if exception_error_type is PERMISSION_ERROR or 'permission' in error_message:",
+            "        return PERMISSION_ERROR",
+            "    if exception_error_type is not None:",
+            "        return exception_error_type",
+            "    if 'network' in error_message:",
+            "        return NETWORK_ERROR",
+            "    if 'validation' in error_message or 'invalid' in error_message:",
+            "        return VALIDATION_ERROR",
         ]
+        
+        # 按定义顺序逐个模式展开关键词判断，多个模式命中时取靠前者
+        pattern_error_types = []
+        for pattern in patterns:
+            if not pattern.keywords:
+                continue
+            condition = " or ".join(
+                f"{keyword.lower()!r} in error_message" for keyword in pattern.keywords
+            )
+            lines.append(f"    if {condition}:")
+            lines.append(f"        return pattern_error_types[{len(pattern_error_types)}]")
+            pattern_error_types.append(pattern.error_type)
+        lines.append("    return UNKNOWN_ERROR")
+        
+        namespace: Dict[str, Any] = {
+            'exception_error_types_get': exception_error_types.get,
+            'pattern_error_types': tuple(pattern_error_types),
+            'TIMEOUT_ERROR': ErrorType.TIMEOUT_ERROR,
+            'PERMISSION_ERROR': ErrorType.PERMISSION_ERROR,
+            'NETWORK_ERROR': ErrorType.NETWORK_ERROR,
+            'VALIDATION_ERROR': ErrorType.VALIDATION_ERROR,
+            'UNKNOWN_ERROR': ErrorType.UNKNOWN_ERROR,
+        }
+        exec(compile("\n".join(lines), "<error_classifier>", "exec"), namespace)
+        return namespace['classify']
     
     def get_recovery_statistics(self) -> Dict[str, Any]:
         """获取恢复统计信息"""
@@ -467,20 +575,29 @@ class ErrorRecoveryManager:
                 self._error_stats['recovered_errors'] / 
                 max(self._error_stats['total_errors'], 1) * 100
             ),
-            'active_circuit_breakers': len([
-                name for name, circuit in self._circuit_breakers.items()
-                if circuit['state'] != 'closed'
-            ])
+            'active_circuit_breakers': sum(
+                1 for circuit in self._circuit_breakers.values()
+                if circuit.state != CIRCUIT_CLOSED
+            )
         }
     
+    def _wake_retry_waiters(self, tool_name: str) -> None:
+        """唤醒正在等待重试的协程"""
+        for wake_event in self._wake_events.pop(tool_name, ()):
+            wake_event.set()
+    
+    def clear_task_history(self, task_id: str) -> None:
+        """清理任务的恢复历史"""
+        self._recovery_history.pop(task_id, None)
+    
     def reset_circuit_breaker(self, tool_name: str) -> bool:
         """重置熔断器"""
-        if tool_name in self._circuit_breakers:
-            self._circuit_breakers[tool_name].update({
-                'failure_count': 0,
-                'state': 'closed',
-                'last_failure_time': None
-            })
+        circuit = self._circuit_breakers.get(tool_name)
+        if circuit is not None:
+            circuit.failure_count = 0
+            circuit.state = CIRCUIT_CLOSED
+            circuit.last_failure_time = 0.0
+            self._wake_retry_waiters(tool_name)
             self.logger.info(f"熔断器已重置: {tool_name}")
             return True
         return False
@@ -6,12 +6,23 @@
 
 import asyncio
 import uuid
-from typing import Dict, Optional, List, Any
-from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Any, Callable, Set
 
 from ..config.settings import FrameworkConfig
 from ..models.execution import UserInteractionEvent, UserInteractionResponse
 from ..utils.logging import get_logger
+from ..utils.async_ext import timeout_after
+from ..utils.ids import new_id
+
+
+# 交互超时后再等待多久回收无人等待的交互（秒）
+_ORPHAN_INTERACTION_GRACE = 5.0
+
+# 确认请求的默认选项
+_DEFAULT_CONFIRM_OPTIONS = (
+    {"action": "continue", "label": "继续"},
+    {"action": "cancel", "label": "取消"},
+)
 
 
 class InteractionManager:
@@ -27,11 +38,23 @@ class InteractionManager:
         
         # 交互状态管理
         self._pending_interactions: Dict[str, UserInteractionEvent] = {}
-        self._interaction_responses: Dict[str, UserInteractionResponse] = {}
-        self._interruption_requests: Dict[str, bool] = {}  # task_id -> interruption_requested
+        # task_id -> {event_id: event} 待处理交互的按任务索引（保持创建顺序）
+        self._task_events: Dict[str, Dict[str, UserInteractionEvent]] = {}
+        self._interruption_requests: Set[str] = set()  # 已请求中断的task_id
+        # task_id -> 中断事件（仅在有调用方需要等待中断时按需创建）
+        self._cancel_events: Dict[str, asyncio.Event] = {}
+        
+        # 响应Future（每个交互只有一个等待方和一个提交方，Future同时承载响应本身）
+        self._response_futures: Dict[str, asyncio.Future] = {}
+        # 无人等待的交互的回收定时器（清理交互时一并取消）
+        self._expiry_handles: Dict[str, asyncio.TimerHandle] = {}
         
-        # 异步事件
-        self._response_events: Dict[str, asyncio.Event] = {}
+        # 交互事件回调（UI等接收方）
+        self._event_callbacks: List[Callable[[UserInteractionEvent], None]] = []
+        
+        # 待批量分发的进度/通知事件（task_id -> 事件列表）
+        self._notification_batches: Dict[str, List[UserInteractionEvent]] = {}
+        self._notification_flush_handle: Optional[asyncio.TimerHandle] = None
         
         self.logger.info("InteractionManager initialized")
     
@@ -45,10 +68,10 @@ class InteractionManager:
         Returns:
             bool: 是否有中断请求
         """
-        if not self.config.interaction.allow_user_interruption:
-            return False
-        
-        return self._interruption_requests.get(task_id, False)
+        return (
+            self.config.interaction.allow_user_interruption
+            and task_id in self._interruption_requests
+        )
     
     def request_interruption(self, task_id: str) -> None:
         """
@@ -58,8 +81,30 @@ class InteractionManager:
             task_id: 要中断的任务ID
         """
         if self.config.interaction.allow_user_interruption:
-            self._interruption_requests[task_id] = True
-            self.logger.info(f"用户请求中断任务: {task_id}")
+            self._interruption_requests.add(task_id)
+            cancel_event = self._cancel_events.get(task_id)
+            if cancel_event is not None:
+                cancel_event.set()
+            self.logger.info("用户请求中断任务: %s", task_id)
+    
+    def cancellation_event(self, task_id: str) -> asyncio.Event:
+        """
+        获取任务的中断事件
+        
+        调用方可以与实际工作竞争等待该事件，而不必轮询check_interruption_request
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            asyncio.Event: 请求中断时被置位的事件
+        """
+        cancel_event = self._cancel_events.get(task_id)
+        if cancel_event is None:
+            cancel_event = self._cancel_events[task_id] = asyncio.Event()
+            if task_id in self._interruption_requests:
+                cancel_event.set()
+        return cancel_event
     
     def clear_interruption_request(self, task_id: str) -> None:
         """
@@ -68,7 +113,14 @@ class InteractionManager:
         Args:
             task_id: 任务ID
         """
-        self._interruption_requests.pop(task_id, None)
+        self._interruption_requests.discard(task_id)
+        cancel_event = self._cancel_events.pop(task_id, None)
+        if cancel_event is not None:
+            cancel_event.clear()
+    
+    def add_event_callback(self, callback: Callable[[UserInteractionEvent], None]) -> None:
+        """添加交互事件回调"""
+        self._event_callbacks.append(callback)
     
     async def create_interaction_event(
         self,
@@ -91,7 +143,8 @@ class InteractionManager:
         Returns:
             UserInteractionEvent: 交互事件
         """
-        event_id = str(uuid.uuid4())
+        # 无需响应的事件不会再被按ID查找，使用计数器ID即可
+        event_id = uuid.uuid4().hex if response_required else new_id()
         timeout = timeout_seconds or self.config.interaction.user_response_timeout
         
         event = UserInteractionEvent(
@@ -105,11 +158,87 @@ class InteractionManager:
         
         if response_required:
             self._pending_interactions[event_id] = event
-            self._response_events[event_id] = asyncio.Event()
+            self._task_events.setdefault(task_id, {})[event_id] = event
+            self._response_futures[event_id] = asyncio.get_running_loop().create_future()
+            # 无人等待响应时（例如任务已异常退出），超时后自动回收
+            self._arm_expiry(event_id, timeout + _ORPHAN_INTERACTION_GRACE)
         
-        self.logger.info(f"创建交互事件: {event_id}, 类型: {event_type}")
+        self._dispatch_event(event)
+        
+        self.logger.info("创建交互事件: %s, 类型: %s", event_id, event_type)
         return event
     
+    def _dispatch_event(self, event: UserInteractionEvent) -> None:
+        """将交互事件分发给回调"""
+        for callback in self._event_callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                self.logger.error("交互事件回调失败: %s", e)
+    
+    async def _emit_notification_event(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        task_id: str
+    ) -> None:
+        """发出无需响应的进度/通知事件，按配置合并为批次分发"""
+        interaction_config = self.config.interaction
+        if not interaction_config.batch_notification_events:
+            await self.create_interaction_event(
+                event_type=event_type,
+                data=data,
+                task_id=task_id,
+                response_required=False
+            )
+            return
+        
+        batch = self._notification_batches.setdefault(task_id, [])
+        batch.append(UserInteractionEvent(
+            id=new_id(),
+            type=event_type,
+            data=data,
+            task_id=task_id,
+            response_required=False,
+            timeout_seconds=interaction_config.user_response_timeout
+        ))
+        
+        if len(batch) >= interaction_config.notification_batch_size:
+            # 达到上限立即分发该任务的批次
+            self._flush_task_notifications(task_id)
+        elif self._notification_flush_handle is None:
+            self._notification_flush_handle = asyncio.get_running_loop().call_later(
+                interaction_config.notification_batch_interval,
+                self._flush_notification_batches
+            )
+    
+    def _flush_notification_batches(self) -> None:
+        """分发所有任务缓冲中的进度/通知事件"""
+        if self._notification_flush_handle is not None:
+            self._notification_flush_handle.cancel()
+            self._notification_flush_handle = None
+        
+        for task_id in list(self._notification_batches):
+            self._flush_task_notifications(task_id)
+    
+    def _flush_task_notifications(self, task_id: str) -> None:
+        """将单个任务缓冲的事件合并为一个progress_batch事件分发"""
+        events = self._notification_batches.pop(task_id, None)
+        if not events:
+            return
+        
+        self._dispatch_event(UserInteractionEvent(
+            id=new_id(),
+            type="progress_batch",
+            data={"events": events},
+            task_id=task_id,
+            # 批次时间戳沿用最后一个事件的时间，不再单独读取当前时间
+            timestamp=events[-1].timestamp,
+            response_required=False,
+            timeout_seconds=self.config.interaction.user_response_timeout
+        ))
+        self.logger.debug("分发交互事件批次: %s, 事件数: %s", task_id, len(events))
+    
     async def wait_for_user_response(
         self,
         event_id: str,
@@ -125,28 +254,28 @@ class InteractionManager:
         Returns:
             Optional[UserInteractionResponse]: 用户响应，超时返回None
         """
-        if event_id not in self._response_events:
-            self.logger.warning(f"事件不存在或不需要响应: {event_id}")
+        response_future = self._response_futures.get(event_id)
+        if response_future is None:
+            self.logger.warning("事件不存在或不需要响应: %s", event_id)
             return None
         
         timeout = timeout_seconds or self.config.interaction.user_response_timeout
+        # 等待期间回收定时器不得早于等待方的超时触发
+        self._arm_expiry(event_id, timeout + _ORPHAN_INTERACTION_GRACE)
         
         try:
-            # 等待响应事件
-            await asyncio.wait_for(
-                self._response_events[event_id].wait(),
-                timeout=timeout
-            )
+            # 超时上下文不像wait_for那样为每次等待额外创建Task；
+            # 响应先于等待到达时Future已完成，直接返回
+            async with timeout_after(timeout):
+                response = await response_future
             
-            # 获取响应
-            response = self._interaction_responses.get(event_id)
             if response:
-                self.logger.info(f"收到用户响应: {event_id}, 动作: {response.action}")
+                self.logger.info("收到用户响应: %s, 动作: %s", event_id, response.action)
             
             return response
             
         except asyncio.TimeoutError:
-            self.logger.warning(f"等待用户响应超时: {event_id}")
+            self.logger.warning("等待用户响应超时: %s", event_id)
             return None
         finally:
             # 清理资源
@@ -169,23 +298,24 @@ class InteractionManager:
         Returns:
             bool: 是否成功提交
         """
-        if event_id not in self._pending_interactions:
-            self.logger.warning(f"无效的事件ID: {event_id}")
+        response_future = self._response_futures.get(event_id)
+        if response_future is None:
+            self.logger.warning("无效的事件ID: %s", event_id)
+            return False
+        
+        if response_future.done():
+            self.logger.warning("事件已响应: %s", event_id)
             return False
         
-        response = UserInteractionResponse(
+        response_future.set_result(UserInteractionResponse(
             event_id=event_id,
             action=action,
             data=data
-        )
+        ))
+        # 已有响应，只需为尚未开始等待的一方保留宽限期
+        self._arm_expiry(event_id, _ORPHAN_INTERACTION_GRACE)
         
-        self._interaction_responses[event_id] = response
-        
-        # 触发响应事件
-        if event_id in self._response_events:
-            self._response_events[event_id].set()
-        
-        self.logger.info(f"用户响应已提交: {event_id}, 动作: {action}")
+        self.logger.info("用户响应已提交: %s, 动作: %s", event_id, action)
         return True
     
     async def request_user_confirmation(
@@ -210,16 +340,11 @@ class InteractionManager:
         if not self.config.interaction.confirmation_required:
             return "continue"  # 如果不需要确认，默认继续
         
-        default_options = [
-            {"action": "continue", "label": "继续"},
-            {"action": "cancel", "label": "取消"}
-        ]
-        
         event = await self.create_interaction_event(
             event_type="confirmation_request",
             data={
                 "message": message,
-                "options": options or default_options
+                "options": options if options is not None else list(_DEFAULT_CONFIRM_OPTIONS)
             },
             task_id=task_id,
             timeout_seconds=timeout_seconds
@@ -254,7 +379,7 @@ class InteractionManager:
             data={
                 "prompt": prompt,
                 "input_type": input_type,
-                "validation_rules": validation_rules or {}
+                "validation_rules": validation_rules if validation_rules is not None else {}
             },
             task_id=task_id,
             timeout_seconds=timeout_seconds
@@ -281,19 +406,23 @@ class InteractionManager:
             message: 进度消息
             percentage: 完成百分比
         """
-        if percentage is None:
-            percentage = (current_step / total_steps) * 100 if total_steps > 0 else 0
+        # 没有接收方时进度事件会被直接丢弃，无需构建
+        if not self._event_callbacks:
+            return
         
-        await self.create_interaction_event(
+        await self._emit_notification_event(
             event_type="progress_update",
             data={
                 "current_step": current_step,
                 "total_steps": total_steps,
                 "message": message,
-                "percentage": percentage
+                "percentage": (
+                    percentage if percentage is not None
+                    else current_step * 100 / total_steps if total_steps > 0
+                    else 0
+                )
             },
-            task_id=task_id,
-            response_required=False
+            task_id=task_id
         )
     
     async def display_notification(
@@ -314,16 +443,19 @@ class InteractionManager:
             message: 通知内容
             data: 额外数据
         """
-        await self.create_interaction_event(
+        # 没有接收方时通知事件会被直接丢弃，无需构建
+        if not self._event_callbacks:
+            return
+        
+        await self._emit_notification_event(
             event_type="notification",
             data={
                 "notification_type": notification_type,
                 "title": title,
                 "message": message,
-                "data": data or {}
+                "data": data if data is not None else {}
             },
-            task_id=task_id,
-            response_required=False
+            task_id=task_id
         )
     
     def get_pending_interactions(self, task_id: Optional[str] = None) -> List[UserInteractionEvent]:
@@ -336,12 +468,10 @@ class InteractionManager:
         Returns:
             List[UserInteractionEvent]: 待处理的交互事件列表
         """
-        events = list(self._pending_interactions.values())
-        
         if task_id:
-            events = [event for event in events if event.task_id == task_id]
+            return list(self._task_events.get(task_id, {}).values())
         
-        return events
+        return list(self._pending_interactions.values())
     
     def cancel_interaction(self, event_id: str) -> bool:
         """
@@ -354,21 +484,53 @@ class InteractionManager:
             bool: 是否成功取消
         """
         if event_id in self._pending_interactions:
-            # 如果有等待的协程，设置事件以解除阻塞
-            if event_id in self._response_events:
-                self._response_events[event_id].set()
+            # 如果有等待的协程，以空响应解除阻塞
+            response_future = self._response_futures.get(event_id)
+            if response_future is not None and not response_future.done():
+                response_future.set_result(None)
             
             self._cleanup_interaction(event_id)
-            self.logger.info(f"交互事件已取消: {event_id}")
+            self.logger.info("交互事件已取消: %s", event_id)
             return True
         
         return False
     
+    def _arm_expiry(self, event_id: str, delay: float) -> None:
+        """（重新）设置交互的回收定时器"""
+        handle = self._expiry_handles.get(event_id)
+        if handle is not None:
+            handle.cancel()
+        # 使用响应Future所属的事件循环，提交响应的一方不一定运行在协程中
+        self._expiry_handles[event_id] = self._response_futures[event_id].get_loop().call_later(
+            delay, self._expire_interaction, event_id
+        )
+    
+    def _expire_interaction(self, event_id: str) -> None:
+        """回收超时后仍未被清理的交互"""
+        self._expiry_handles.pop(event_id, None)
+        if event_id not in self._pending_interactions:
+            return
+        
+        response_future = self._response_futures.get(event_id)
+        if response_future is not None and not response_future.done():
+            response_future.set_result(None)
+        
+        self._cleanup_interaction(event_id)
+        self.logger.debug("回收过期交互事件: %s", event_id)
+    
     def _cleanup_interaction(self, event_id: str) -> None:
         """清理交互资源"""
-        self._pending_interactions.pop(event_id, None)
-        self._interaction_responses.pop(event_id, None)
-        self._response_events.pop(event_id, None)
+        event = self._pending_interactions.pop(event_id, None)
+        if event is not None:
+            task_events = self._task_events.get(event.task_id)
+            if task_events is not None:
+                task_events.pop(event_id, None)
+                if not task_events:
+                    del self._task_events[event.task_id]
+        self._response_futures.pop(event_id, None)
+        handle = self._expiry_handles.pop(event_id, None)
+        if handle is not None:
+            handle.cancel()
     
     def cleanup_task_interactions(self, task_id: str) -> None:
         """
@@ -377,21 +539,24 @@ class InteractionManager:
         Args:
             task_id: 任务ID
         """
-        # 收集要清理的事件ID
-        event_ids_to_cleanup = []
-        
-        for event_id, event in self._pending_interactions.items():
-            if event.task_id == task_id:
-                event_ids_to_cleanup.append(event_id)
-        
-        # 清理事件
-        for event_id in event_ids_to_cleanup:
-            self.cancel_interaction(event_id)
+        # 单次遍历任务索引，直接清理各事件的状态并以空响应解除等待
+        task_events = self._task_events.pop(task_id, {})
+        for event_id in task_events:
+            self._pending_interactions.pop(event_id, None)
+            response_future = self._response_futures.pop(event_id, None)
+            if response_future is not None and not response_future.done():
+                response_future.set_result(None)
+            handle = self._expiry_handles.pop(event_id, None)
+            if handle is not None:
+                handle.cancel()
+        
+        # 分发该任务尚未发出的进度/通知事件
+        self._flush_task_notifications(task_id)
         
         # 清理中断请求
         self.clear_interruption_request(task_id)
         
-        self.logger.info(f"任务交互已清理: {task_id}, 清理事件数: {len(event_ids_to_cleanup)}")
+        self.logger.info("任务交互已清理: %s, 清理事件数: %s", task_id, len(task_events))
     
     def get_interaction_statistics(self) -> Dict[str, Any]:
         """
@@ -402,9 +567,10 @@ class InteractionManager:
         """
         return {
             "pending_interactions": len(self._pending_interactions),
-            "active_tasks_with_interactions": len(set(
-                event.task_id for event in self._pending_interactions.values()
-            )),
+            "active_tasks_with_interactions": len(self._task_events),
             "interruption_requests": len(self._interruption_requests),
-            "total_responses_received": len(self._interaction_responses)
+            "total_responses_received": sum(
+                1 for future in self._response_futures.values()
+                if future.done() and not future.cancelled() and future.result() is not None
+            )
         }
@@ -5,12 +5,16 @@
 """
 
 import json
+import os
 import pickle
 import sqlite3
+import struct
+import sys
+import time
 import asyncio
-import aiofiles
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Hashable, Tuple, Union
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from dataclasses import asdict
 from contextlib import asynccontextmanager
@@ -25,6 +29,188 @@ def datetime_serializer(obj):
         return obj.isoformat()
     raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 from ..utils.logging import get_logger
+from ..utils.async_ext import to_thread_fast, timeout_after
+from ..utils.ids import new_id
+
+try:
+    import msgspec
+    
+    _json_encoder = msgspec.json.Encoder()
+    _json_decoder = msgspec.json.Decoder()
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+    _msgpack_decoder = msgspec.msgpack.Decoder()
+    
+    def _encode_json(data: Any) -> bytes:
+        """序列化为JSON（msgspec原生支持datetime和Enum）"""
+        return _json_encoder.encode(data)
+    
+    def _decode_json(content: Union[str, bytes]) -> Any:
+        """反序列化JSON"""
+        return _json_decoder.decode(content)
+except ImportError:  # msgspec not installed
+    msgspec = None
+    
+    def _encode_json(data: Any) -> bytes:
+        """序列化为紧凑JSON（状态文件仅供程序读取，不缩进）"""
+        return json.dumps(data, separators=(',', ':'), default=datetime_serializer).encode('ascii')
+    
+    def _decode_json(content: Union[str, bytes]) -> Any:
+        """反序列化JSON"""
+        return json.loads(content)
+
+try:
+    import zstandard
+    
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:  # zstandard not installed
+    zstandard = None
+
+
+# MessagePack帧头：4字节大端长度前缀，用于校验写入是否完整
+_FRAME_HEADER = struct.Struct(">I")
+
+# 反序列化热路径使用的查找表和函数别名，省去Enum.__call__和属性查找
+_STATUS_BY_VALUE: Dict[str, TaskStatus] = {status.value: status for status in TaskStatus}
+_fromisoformat = datetime.fromisoformat
+_fromtimestamp = datetime.fromtimestamp
+_intern = sys.intern
+
+
+def _dt_to_us(dt: Optional[datetime]) -> Optional[int]:
+    """将datetime转换为epoch微秒整数（省去isoformat的字符串格式化）"""
+    return round(dt.timestamp() * 1_000_000) if dt is not None else None
+
+
+def _us_to_dt(value: Union[int, str, None]) -> Optional[datetime]:
+    """从epoch微秒整数恢复datetime（兼容旧数据中的ISO字符串）"""
+    if value is None:
+        return None
+    if value.__class__ is int:
+        return _fromtimestamp(value / 1_000_000)
+    return _fromisoformat(value)
+
+
+def _task_to_data(task: Task) -> Dict[str, Any]:
+    """将任务转换为可序列化的字典"""
+    return {
+        'id': task.id,
+        'query': task.query,
+        'description': task.description,
+        'status': task.status.value,
+        'created_at': _dt_to_us(task.created_at),
+        'started_at': _dt_to_us(task.started_at),
+        'completed_at': _dt_to_us(task.completed_at),
+        'complexity': task.complexity.model_dump() if task.complexity else None,
+        'todo_list': [_todo_to_data(todo) for todo in task.todo_list],
+        'metadata': task.metadata
+    }
+
+
+def _todo_to_data(todo: TodoItem) -> Dict[str, Any]:
+    """将TodoItem转换为可序列化的字典"""
+    return {
+        'id': todo.id,
+        'content': todo.content,
+        'status': todo.status.value,
+        'tools_needed': todo.tools_needed,
+        'dependencies': todo.dependencies,
+        'priority': todo.priority,
+        'estimated_duration': todo.estimated_duration,
+        'created_at': _dt_to_us(todo.created_at),
+        'started_at': _dt_to_us(todo.started_at),
+        'completed_at': _dt_to_us(todo.completed_at),
+        'metadata': todo.metadata
+    }
+
+
+def _task_from_data(task_data: Dict[str, Any]) -> Task:
+    """从字典恢复任务"""
+    # 反序列化任务
+    task = Task(
+        id=task_data['id'],
+        query=task_data['query'],
+        description=task_data['description'],
+        status=_STATUS_BY_VALUE[task_data['status']],
+        created_at=_us_to_dt(task_data['created_at']),
+        started_at=_us_to_dt(task_data['started_at']),
+        completed_at=_us_to_dt(task_data['completed_at']),
+        metadata=task_data.get('metadata', {})
+    )
+    
+    # 反序列化复杂度
+    if task_data.get('complexity'):
+        from ..models.task import TaskComplexity
+        task.complexity = TaskComplexity(**task_data['complexity'])
+    
+    # 反序列化TodoList
+    task.todo_list = [_todo_from_data(todo_data) for todo_data in task_data.get('todo_list', [])]
+    
+    return task
+
+
+def _todo_from_data(todo_data: Dict[str, Any]) -> TodoItem:
+    """从字典恢复TodoItem"""
+    # 工具名和依赖ID在各个TodoItem之间大量重复，驻留后缓存中的任务共享同一份字符串
+    return TodoItem(
+        id=_intern(todo_data['id']),
+        content=todo_data['content'],
+        status=_STATUS_BY_VALUE[todo_data['status']],
+        tools_needed=[_intern(name) for name in todo_data.get('tools_needed', [])],
+        dependencies=[_intern(dep_id) for dep_id in todo_data.get('dependencies', [])],
+        priority=todo_data.get('priority', 0),
+        estimated_duration=todo_data.get('estimated_duration'),
+        created_at=_us_to_dt(todo_data['created_at']),
+        started_at=_us_to_dt(todo_data.get('started_at')),
+        completed_at=_us_to_dt(todo_data.get('completed_at')),
+        metadata=todo_data.get('metadata', {})
+    )
+
+
+def _file_stamp(st: os.stat_result) -> Tuple[int, int]:
+    """文件的修改时间与大小，用于判断文件在上次读写之后是否被改动"""
+    return st.st_mtime_ns, st.st_size
+
+
+def _write_file_atomic(path: Path, payload: bytes) -> Tuple[int, int]:
+    """
+    写入同目录下的临时文件并fsync后再替换目标文件，崩溃时不会留下写了一半的文件
+    
+    Returns:
+        Tuple[int, int]: 写入后文件的(修改时间, 大小)
+    """
+    tmp_path = path.with_name(f"{path.name}.{new_id()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            stamp = _file_stamp(os.fstat(f.fileno()))
+        os.replace(tmp_path, path)
+        return stamp
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _read_file_with_stamp(path: Path) -> Tuple[Tuple[int, int], bytes]:
+    """读取文件内容，并返回与内容对应的(修改时间, 大小)"""
+    with open(path, 'rb') as f:
+        return _file_stamp(os.fstat(f.fileno())), f.read()
+
+
+def _fsync_dir(path: Path) -> None:
+    """fsync目录，使其中的rename持久化（Windows不支持打开目录，直接跳过）"""
+    if os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 class StateStorage:
@@ -34,6 +220,24 @@ class StateStorage:
         """保存任务状态"""
         raise NotImplementedError
     
+    async def save_task_states_batch(self, tasks: List[Task]) -> None:
+        """批量保存任务状态（默认逐个保存，子类可合并为单次写入）"""
+        for task in tasks:
+            await self.save_task_state(task)
+    
+    def prepare_task_state(self, task: Task) -> Hashable:
+        """
+        将任务编码为写入存储的数据
+        
+        结果可哈希，StateManager用其哈希值判断内容是否变化，
+        变化时把同一份数据交给save_prepared_task_states写入，避免重复序列化
+        """
+        return _encode_json(_task_to_data(task))
+    
+    async def save_prepared_task_states(self, prepared: List[Tuple[Task, Any]]) -> None:
+        """保存已由prepare_task_state编码的任务（默认忽略编码结果，按任务保存）"""
+        await self.save_task_states_batch([task for task, _ in prepared])
+    
     async def load_task_state(self, task_id: str) -> Optional[Task]:
         """加载任务状态"""
         raise NotImplementedError
@@ -54,98 +258,107 @@ class StateStorage:
 class FileSystemStateStorage(StateStorage):
     """基于文件系统的状态存储"""
     
-    def __init__(self, storage_dir: str = "./utf_state"):
+    def __init__(
+        self,
+        storage_dir: str = "./utf_state",
+        use_msgpack: bool = False,
+        compress: bool = False
+    ):
+        if use_msgpack and msgspec is None:
+            raise ImportError("MessagePack状态格式需要安装msgspec: pip install msgspec")
+        if compress and zstandard is None:
+            raise ImportError("任务状态压缩需要安装zstandard: pip install zstandard")
+        
         self.storage_dir = Path(storage_dir)
+        self.use_msgpack = use_msgpack
+        self.compress = compress
+        self._task_suffix = (".mp" if use_msgpack else ".json") + (".zst" if compress else "")
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.logger = get_logger(__name__)
         
         # 创建子目录
-        (self.storage_dir / "tasks").mkdir(exist_ok=True)
+        self._tasks_dir = self.storage_dir / "tasks"
+        self._tasks_dir.mkdir(exist_ok=True)
         (self.storage_dir / "contexts").mkdir(exist_ok=True)
         (self.storage_dir / "results").mkdir(exist_ok=True)
+        self._remove_stale_temp_files()
+        
+        # task_id -> (文件的修改时间与大小, 状态)，在保存/加载/删除时维护；
+        # 按状态列出时文件未被改动（包括其他进程）的任务无需重新读取
+        self._status_index: Dict[str, Tuple[Tuple[int, int], TaskStatus]] = {}
         
         self.logger.info(f"FileSystemStateStorage initialized: {self.storage_dir}")
     
     async def save_task_state(self, task: Task) -> None:
         """保存任务状态到文件"""
-        task_file = self.storage_dir / "tasks" / f"{task.id}.json"
-        
-        # 序列化任务数据
-        task_data = {
-            'id': task.id,
-            'query': task.query,
-            'description': task.description,
-            'status': task.status.value,
-            'created_at': task.created_at.isoformat(),
-            'started_at': task.started_at.isoformat() if task.started_at else None,
-            'completed_at': task.completed_at.isoformat() if task.completed_at else None,
-            'complexity': task.complexity.model_dump() if task.complexity else None,
-            'todo_list': [todo.model_dump() for todo in task.todo_list],
-            'metadata': task.metadata
-        }
-        
-        async with aiofiles.open(task_file, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(task_data, indent=2, ensure_ascii=False, default=datetime_serializer))
+        await self.save_prepared_task_states([(task, self.prepare_task_state(task))])
+    
+    async def save_task_states_batch(self, tasks: List[Task]) -> None:
+        """批量保存任务状态到文件"""
+        await self.save_prepared_task_states([(task, self.prepare_task_state(task)) for task in tasks])
+    
+    def prepare_task_state(self, task: Task) -> bytes:
+        """将任务编码为文件内容"""
+        return self._encode_task_data(_task_to_data(task))
+    
+    async def save_prepared_task_states(self, prepared: List[Tuple[Task, bytes]]) -> None:
+        """写入已编码的任务状态文件"""
+        if len(prepared) == 1:
+            # 临时文件写入、替换和目录fsync在一次线程池调度中完成
+            task, payload = prepared[0]
+            stamps = [await to_thread_fast(self._write_task_file, self._task_file(task.id), payload)]
+            self.logger.debug(f"任务状态已保存: {task.id}")
+        else:
+            # 并发写入多个文件，全部替换完成后只对目录fsync一次
+            stamps = await asyncio.gather(*(
+                to_thread_fast(_write_file_atomic, self._task_file(task.id), payload)
+                for task, payload in prepared
+            ))
+            await to_thread_fast(_fsync_dir, self._tasks_dir)
+            self.logger.debug(f"批量保存了 {len(prepared)} 个任务状态")
         
-        self.logger.debug(f"任务状态已保存: {task.id}")
+        for (task, _), stamp in zip(prepared, stamps):
+            self._status_index[task.id] = (stamp, task.status)
+    
+    def _write_task_file(self, task_file: Path, payload: bytes) -> Tuple[int, int]:
+        """原子写入单个任务状态文件，返回文件的(修改时间, 大小)"""
+        stamp = _write_file_atomic(task_file, payload)
+        _fsync_dir(self._tasks_dir)
+        return stamp
+    
+    def _remove_stale_temp_files(self) -> None:
+        """清理上次崩溃时遗留的临时文件"""
+        with os.scandir(self._tasks_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError as e:
+                        self.logger.warning(f"清理临时文件失败: {entry.path}, 错误: {e}")
     
     async def load_task_state(self, task_id: str) -> Optional[Task]:
         """从文件加载任务状态"""
-        task_file = self.storage_dir / "tasks" / f"{task_id}.json"
-        
-        if not task_file.exists():
-            return None
+        task_file = self._task_file(task_id)
         
         try:
-            async with aiofiles.open(task_file, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                task_data = json.loads(content)
-            
-            # 反序列化任务
-            task = Task(
-                id=task_data['id'],
-                query=task_data['query'],
-                description=task_data['description'],
-                status=TaskStatus(task_data['status']),
-                created_at=datetime.fromisoformat(task_data['created_at']),
-                started_at=datetime.fromisoformat(task_data['started_at']) if task_data['started_at'] else None,
-                completed_at=datetime.fromisoformat(task_data['completed_at']) if task_data['completed_at'] else None,
-                metadata=task_data.get('metadata', {})
-            )
-            
-            # 反序列化复杂度
-            if task_data.get('complexity'):
-                from ..models.task import TaskComplexity
-                task.complexity = TaskComplexity(**task_data['complexity'])
-            
-            # 反序列化TodoList
-            task.todo_list = []
-            for todo_data in task_data.get('todo_list', []):
-                todo = TodoItem(
-                    id=todo_data['id'],
-                    content=todo_data['content'],
-                    status=TaskStatus(todo_data['status']),
-                    tools_needed=todo_data.get('tools_needed', []),
-                    dependencies=todo_data.get('dependencies', []),
-                    priority=todo_data.get('priority', 0),
-                    estimated_duration=todo_data.get('estimated_duration'),
-                    created_at=datetime.fromisoformat(todo_data['created_at']),
-                    started_at=datetime.fromisoformat(todo_data['started_at']) if todo_data['started_at'] else None,
-                    completed_at=datetime.fromisoformat(todo_data['completed_at']) if todo_data['completed_at'] else None,
-                    metadata=todo_data.get('metadata', {})
-                )
-                task.todo_list.append(todo)
+            # 直接读取，文件不存在时由FileNotFoundError处理，省去单独的exists()检查
+            stamp, content = await to_thread_fast(_read_file_with_stamp, task_file)
+            task = _task_from_data(self._decode_task_data(content))
+            self._status_index[task_id] = (stamp, task.status)
             
             self.logger.debug(f"任务状态已加载: {task_id}")
             return task
             
+        except FileNotFoundError:
+            return None
         except Exception as e:
             self.logger.error(f"加载任务状态失败: {task_id}, 错误: {e}")
             return None
     
     async def delete_task_state(self, task_id: str) -> bool:
         """删除任务状态文件"""
-        task_file = self.storage_dir / "tasks" / f"{task_id}.json"
+        task_file = self._task_file(task_id)
+        self._status_index.pop(task_id, None)
         
         try:
             if task_file.exists():
@@ -164,28 +377,75 @@ class FileSystemStateStorage(StateStorage):
     ) -> List[str]:
         """列出任务状态文件"""
         task_ids = []
-        tasks_dir = self.storage_dir / "tasks"
+        tasks_dir = self._tasks_dir
+        suffix = self._task_suffix
+        suffix_len = len(suffix)
         
         try:
-            for task_file in tasks_dir.glob("*.json"):
-                task_id = task_file.stem
-                
-                # 如果指定了状态过滤
-                if status:
-                    task = await self.load_task_state(task_id)
-                    if not task or task.status != status:
+            # scandir直接返回目录项，不为每个文件构造Path
+            with os.scandir(tasks_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(suffix):
                         continue
+                    task_id = entry.name[:-suffix_len]
                 
-                task_ids.append(task_id)
+                    # 如果指定了状态过滤（索引中没有或文件已被改动的任务才需要读取文件）
+                    if status:
+                        indexed = self._status_index.get(task_id)
+                        try:
+                            stamp = _file_stamp(entry.stat())
+                        except FileNotFoundError:
+                            continue
+                        if indexed is not None and indexed[0] == stamp:
+                            task_status = indexed[1]
+                        else:
+                            task = await self.load_task_state(task_id)
+                            if not task:
+                                continue
+                            task_status = task.status
+                        if task_status != status:
+                            continue
                 
-                if limit and len(task_ids) >= limit:
-                    break
+                    task_ids.append(task_id)
+                
+                    if limit and len(task_ids) >= limit:
+                        break
             
         except Exception as e:
             self.logger.error(f"列出任务状态失败: {e}")
         
         return task_ids
     
+    def _task_file(self, task_id: str) -> Path:
+        """获取任务状态文件路径"""
+        return self._tasks_dir / f"{task_id}{self._task_suffix}"
+    
+    def _encode_task_data(self, task_data: Dict[str, Any]) -> bytes:
+        """编码任务数据（JSON，或带长度前缀的MessagePack帧；启用压缩时先经zstd压缩）"""
+        if not self.use_msgpack:
+            payload = _encode_json(task_data)
+            return _zstd_compressor.compress(payload) if self.compress else payload
+        
+        payload = _msgpack_encoder.encode(task_data)
+        if self.compress:
+            payload = _zstd_compressor.compress(payload)
+        return _FRAME_HEADER.pack(len(payload)) + payload
+    
+    def _decode_task_data(self, content: bytes) -> Dict[str, Any]:
+        """解码任务数据"""
+        if not self.use_msgpack:
+            if self.compress:
+                content = _zstd_decompressor.decompress(content)
+            return _decode_json(content)
+        
+        (length,) = _FRAME_HEADER.unpack_from(content)
+        payload = content[_FRAME_HEADER.size:]
+        if len(payload) != length:
+            raise ValueError(f"任务状态帧不完整: 期望 {length} 字节, 实际 {len(payload)} 字节")
+        if self.compress:
+            payload = _zstd_decompressor.decompress(payload)
+        return _msgpack_decoder.decode(payload)
+    
     async def save_execution_context(self, context: ExecutionContext) -> None:
         """保存执行上下文"""
         context_file = self.storage_dir / "contexts" / f"{context.task_id}.json"
@@ -203,18 +463,86 @@ class FileSystemStateStorage(StateStorage):
             'metadata': context.metadata
         }
         
-        async with aiofiles.open(context_file, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(context_data, indent=2, ensure_ascii=False))
+        await to_thread_fast(_write_file_atomic, context_file, _encode_json(context_data))
 
 
 class DatabaseStateStorage(StateStorage):
     """基于数据库的状态存储"""
     
+    # 已存在的行原地更新，不像INSERT OR REPLACE那样先删除再插入整行（需要SQLite 3.24+）
+    _SAVE_TASK_SQL = '''
+        INSERT INTO tasks 
+        (id, query, description, status, created_at, started_at, completed_at,
+         complexity_data, todo_list_data, metadata_data, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(id) DO UPDATE SET
+            query = excluded.query,
+            description = excluded.description,
+            status = excluded.status,
+            started_at = excluded.started_at,
+            completed_at = excluded.completed_at,
+            complexity_data = excluded.complexity_data,
+            todo_list_data = excluded.todo_list_data,
+            metadata_data = excluded.metadata_data,
+            updated_at = CURRENT_TIMESTAMP
+    '''
+    
+    _LOAD_TASK_SQL = '''
+        SELECT id, query, description, status, created_at, started_at, completed_at,
+               complexity_data, todo_list_data, metadata_data
+        FROM tasks WHERE id = ?
+    '''
+    
+    # TodoItem按行存储在todos表中，单个TodoItem变化时只重写对应的行
+    _SAVE_TODO_SQL = '''
+        INSERT INTO todos 
+        (task_id, id, position, content, status, priority, created_at, started_at, completed_at, data)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(task_id, id) DO UPDATE SET
+            position = excluded.position,
+            content = excluded.content,
+            status = excluded.status,
+            priority = excluded.priority,
+            started_at = excluded.started_at,
+            completed_at = excluded.completed_at,
+            data = excluded.data
+    '''
+    
+    _LOAD_TODOS_SQL = '''
+        SELECT task_id, id, position, content, status, priority, created_at, started_at, completed_at, data
+        FROM todos WHERE task_id = ? ORDER BY position
+    '''
+    
+    # sqlite3按SQL文本缓存已编译的语句；所有SQL均为固定文本、参数绑定，在长连接上只需编译一次
+    _STATEMENT_CACHE_SIZE = 256
+    
+    # 遍历游标时每次从工作线程取回的行数
+    _ITER_CHUNK_SIZE = 256
+    
+    # 数据库结构版本（记录在PRAGMA user_version中）：1 = 时间列统一为epoch微秒整数
+    _SCHEMA_VERSION = 1
+    
+    # 每个连接的性能参数（journal_mode=WAL在建表时已持久化到数据库文件）
+    _CONNECTION_PRAGMAS = '''
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+    '''
+    
     def __init__(self, db_path: str = "./utf_state.db"):
         self.db_path = db_path
         self.logger = get_logger(__name__)
         self._init_database()
         
+        # aiosqlite长连接，首次使用时在事件循环中建立
+        self._conn = None
+        self._conn_lock: Optional[asyncio.Lock] = None
+        # 所有协程共用同一连接和事务，写入到commit/rollback之间必须互斥（首次使用时创建）
+        self._tx_lock: Optional[asyncio.Lock] = None
+        
+        # task_id -> {todo_id: 已写入行的指纹}，用于只写入发生变化的TodoItem
+        self._todo_fingerprints: Dict[str, Dict[str, int]] = {}
+        
         self.logger.info(f"DatabaseStateStorage initialized: {db_path}")
     
     def _init_database(self) -> None:
@@ -222,16 +550,19 @@ class DatabaseStateStorage(StateStorage):
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
-            # 创建任务表
+            # WAL模式下读取不会被写入阻塞
+            cursor.execute('PRAGMA journal_mode=WAL')
+            
+            # 创建任务表（时间列保存epoch微秒整数）
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS tasks (
                     id TEXT PRIMARY KEY,
                     query TEXT NOT NULL,
                     description TEXT,
                     status TEXT NOT NULL,
-                    created_at TIMESTAMP NOT NULL,
-                    started_at TIMESTAMP,
-                    completed_at TIMESTAMP,
+                    created_at INTEGER NOT NULL,
+                    started_at INTEGER,
+                    completed_at INTEGER,
                     complexity_data TEXT,
                     todo_list_data TEXT,
                     metadata_data TEXT,
@@ -239,6 +570,27 @@ class DatabaseStateStorage(StateStorage):
                 )
             ''')
             
+            # 创建TodoItem表（data列保存工具、依赖、元数据等其余字段的JSON）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS todos (
+                    task_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    started_at INTEGER,
+                    completed_at INTEGER,
+                    data TEXT,
+                    PRIMARY KEY (task_id, id)
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_task_status ON todos(task_id, status)')
+            
+            if cursor.execute('PRAGMA user_version').fetchone()[0] < 1:
+                self._migrate_timestamps_to_us(cursor)
+            
             # 创建执行上下文表
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS execution_contexts (
@@ -264,126 +616,247 @@ class DatabaseStateStorage(StateStorage):
                 )
             ''')
             
+            cursor.execute(f'PRAGMA user_version = {self._SCHEMA_VERSION}')
             conn.commit()
     
+    @staticmethod
+    def _migrate_timestamps_to_us(cursor: sqlite3.Cursor) -> None:
+        """将旧版本写入的ISO字符串时间列转换为epoch微秒整数，保证按created_at排序时新旧行可比"""
+        for table in ('tasks', 'todos'):
+            rows = cursor.execute(f'''
+                SELECT rowid, created_at, started_at, completed_at FROM {table}
+                WHERE typeof(created_at) = 'text' OR typeof(started_at) = 'text'
+                   OR typeof(completed_at) = 'text'
+            ''').fetchall()
+            if rows:
+                cursor.executemany(
+                    f'UPDATE {table} SET created_at = ?, started_at = ?, completed_at = ? WHERE rowid = ?',
+                    [
+                        (*(_dt_to_us(_us_to_dt(value)) for value in row[1:]), row[0])
+                        for row in rows
+                    ]
+                )
+    
+    async def _get_connection(self) -> Any:
+        """获取长连接（首次使用时建立）"""
+        if self._conn is None:
+            if self._conn_lock is None:
+                self._conn_lock = asyncio.Lock()
+            
+            async with self._conn_lock:
+                if self._conn is None:
+                    try:
+                        import aiosqlite
+                    except ImportError:
+                        raise ImportError("数据库状态存储需要安装aiosqlite: pip install aiosqlite")
+                    
+                    conn = await aiosqlite.connect(
+                        self.db_path,
+                        iter_chunk_size=self._ITER_CHUNK_SIZE,
+                        cached_statements=self._STATEMENT_CACHE_SIZE
+                    )
+                    await conn.executescript(self._CONNECTION_PRAGMAS)
+                    self._conn = conn
+        
+        return self._conn
+    
+    def _get_tx_lock(self) -> asyncio.Lock:
+        """获取事务锁，保证同一时间只有一个协程在长连接上读写事务"""
+        if self._tx_lock is None:
+            self._tx_lock = asyncio.Lock()
+        return self._tx_lock
+    
+    async def close(self) -> None:
+        """关闭数据库连接"""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+    
     async def save_task_state(self, task: Task) -> None:
         """保存任务状态到数据库"""
-        await asyncio.get_event_loop().run_in_executor(
-            None, self._save_task_state_sync, task
+        await self.save_prepared_task_states([(task, self.prepare_task_state(task))])
+    
+    async def save_task_states_batch(self, tasks: List[Task]) -> None:
+        """在单个事务中批量保存任务状态"""
+        await self.save_prepared_task_states([(task, self.prepare_task_state(task)) for task in tasks])
+    
+    def prepare_task_state(self, task: Task) -> Tuple[tuple, Tuple[tuple, ...]]:
+        """将任务编码为 (tasks表的行, todos表的各行)"""
+        return (
+            self._task_row(task),
+            tuple(self._todo_row(task.id, position, todo) for position, todo in enumerate(task.todo_list))
         )
     
-    def _save_task_state_sync(self, task: Task) -> None:
-        """同步保存任务状态"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # 序列化复杂数据
-            complexity_data = json.dumps(task.complexity.model_dump()) if task.complexity else None
-            todo_list_data = json.dumps([todo.model_dump() for todo in task.todo_list])
-            metadata_data = json.dumps(task.metadata)
+    async def save_prepared_task_states(self, prepared: List[Tuple[Task, Any]]) -> None:
+        """在单个事务中写入已编码的任务状态"""
+        conn = await self._get_connection()
+        async with self._get_tx_lock():
+            await self._save_tasks_locked(conn, prepared)
+    
+    async def _save_tasks_locked(self, conn: Any, prepared: List[Tuple[Task, Any]]) -> None:
+        """在持有事务锁时写入并提交任务，失败时回滚"""
+        try:
+            await conn.executemany(self._SAVE_TASK_SQL, [task_row for _, (task_row, _) in prepared])
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO tasks 
-                (id, query, description, status, created_at, started_at, completed_at,
-                 complexity_data, todo_list_data, metadata_data, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (
-                task.id,
-                task.query,
-                task.description,
-                task.status.value,
-                task.created_at.isoformat(),
-                task.started_at.isoformat() if task.started_at else None,
-                task.completed_at.isoformat() if task.completed_at else None,
-                complexity_data,
-                todo_list_data,
-                metadata_data
-            ))
+            todo_rows = []
+            saved_fingerprints = {}
+            for task, (_, rows) in prepared:
+                known = self._todo_fingerprints.get(task.id)
+                fingerprints = {}
+                
+                if known is None:
+                    # 不清楚表中已有哪些行时整体重写该任务的TodoItem
+                    await conn.execute('DELETE FROM todos WHERE task_id = ?', (task.id,))
+                    known = {}
+                
+                for row in rows:
+                    fingerprint = hash(row)
+                    fingerprints[row[1]] = fingerprint
+                    if known.get(row[1]) != fingerprint:
+                        todo_rows.append(row)
+                
+                removed_ids = [todo_id for todo_id in known if todo_id not in fingerprints]
+                if removed_ids:
+                    await conn.executemany(
+                        'DELETE FROM todos WHERE task_id = ? AND id = ?',
+                        [(task.id, todo_id) for todo_id in removed_ids]
+                    )
+                saved_fingerprints[task.id] = fingerprints
             
-            conn.commit()
+            if todo_rows:
+                await conn.executemany(self._SAVE_TODO_SQL, todo_rows)
+            await conn.commit()
+        except Exception:
+            # 避免未提交的部分写入留在事务中，被之后的提交一并写入
+            await conn.rollback()
+            raise
+        
+        # 提交成功后才更新指纹，失败时下次保存仍会写入这些行
+        self._todo_fingerprints.update(saved_fingerprints)
     
-    async def load_task_state(self, task_id: str) -> Optional[Task]:
-        """从数据库加载任务状态"""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._load_task_state_sync, task_id
+    def _task_row(self, task: Task) -> tuple:
+        """将任务转换为tasks表的一行"""
+        # 序列化复杂数据（TodoList存储在todos表中，todo_list_data仅用于读取旧数据）
+        complexity_data = _encode_json(task.complexity.model_dump()).decode('utf-8') if task.complexity else None
+        todo_list_data = None
+        metadata_data = _encode_json(task.metadata).decode('utf-8')
+        
+        return (
+            task.id,
+            task.query,
+            task.description,
+            task.status.value,
+            _dt_to_us(task.created_at),
+            _dt_to_us(task.started_at),
+            _dt_to_us(task.completed_at),
+            complexity_data,
+            todo_list_data,
+            metadata_data
         )
     
-    def _load_task_state_sync(self, task_id: str) -> Optional[Task]:
-        """同步加载任务状态"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, query, description, status, created_at, started_at, completed_at,
-                       complexity_data, todo_list_data, metadata_data
-                FROM tasks WHERE id = ?
-            ''', (task_id,))
+    def _todo_row(self, task_id: str, position: int, todo: TodoItem) -> tuple:
+        """将TodoItem转换为todos表的一行"""
+        data = _encode_json({
+            'tools_needed': todo.tools_needed,
+            'dependencies': todo.dependencies,
+            'estimated_duration': todo.estimated_duration,
+            'metadata': todo.metadata
+        }).decode('utf-8')
+        
+        return (
+            task_id,
+            todo.id,
+            position,
+            todo.content,
+            todo.status.value,
+            todo.priority,
+            _dt_to_us(todo.created_at),
+            _dt_to_us(todo.started_at),
+            _dt_to_us(todo.completed_at),
+            data
+        )
+    
+    async def load_task_state(self, task_id: str) -> Optional[Task]:
+        """从数据库加载任务状态"""
+        conn = await self._get_connection()
+        # 在事务锁内读取，避免读到其他协程尚未提交、之后可能被回滚的行并据此记录指纹
+        async with self._get_tx_lock():
+            async with conn.execute(self._LOAD_TASK_SQL, (task_id,)) as cursor:
+                row = await cursor.fetchone()
             
-            row = cursor.fetchone()
             if not row:
                 return None
             
-            try:
-                # 反序列化任务
-                task = Task(
-                    id=row[0],
-                    query=row[1],
-                    description=row[2],
-                    status=TaskStatus(row[3]),
-                    created_at=datetime.fromisoformat(row[4]),
-                    started_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                    completed_at=datetime.fromisoformat(row[6]) if row[6] else None,
-                    metadata=json.loads(row[9]) if row[9] else {}
-                )
-                
-                # 反序列化复杂度
-                if row[7]:
-                    from ..models.task import TaskComplexity
-                    complexity_data = json.loads(row[7])
-                    task.complexity = TaskComplexity(**complexity_data)
-                
-                # 反序列化TodoList
-                if row[8]:
-                    todo_list_data = json.loads(row[8])
-                    task.todo_list = []
-                    for todo_data in todo_list_data:
-                        todo = TodoItem(
-                            id=todo_data['id'],
-                            content=todo_data['content'],
-                            status=TaskStatus(todo_data['status']),
-                            tools_needed=todo_data.get('tools_needed', []),
-                            dependencies=todo_data.get('dependencies', []),
-                            priority=todo_data.get('priority', 0),
-                            estimated_duration=todo_data.get('estimated_duration'),
-                            created_at=datetime.fromisoformat(todo_data['created_at']),
-                            started_at=datetime.fromisoformat(todo_data['started_at']) if todo_data['started_at'] else None,
-                            completed_at=datetime.fromisoformat(todo_data['completed_at']) if todo_data['completed_at'] else None,
-                            metadata=todo_data.get('metadata', {})
-                        )
-                        task.todo_list.append(todo)
-                
-                return task
-                
-            except Exception as e:
-                self.logger.error(f"反序列化任务失败: {task_id}, 错误: {e}")
-                return None
+            async with conn.execute(self._LOAD_TODOS_SQL, (task_id,)) as cursor:
+                todo_rows = await cursor.fetchall()
+        
+        try:
+            task = self._task_from_row(row)
+            if todo_rows:
+                task.todo_list = [self._todo_from_row(todo_row) for todo_row in todo_rows]
+            self._todo_fingerprints[task_id] = {todo_row[1]: hash(todo_row) for todo_row in todo_rows}
+            return task
+        except Exception as e:
+            self.logger.error(f"反序列化任务失败: {task_id}, 错误: {e}")
+            return None
     
-    async def delete_task_state(self, task_id: str) -> bool:
-        """删除数据库中的任务状态"""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._delete_task_state_sync, task_id
+    def _task_from_row(self, row: tuple) -> Task:
+        """从tasks表的一行恢复任务"""
+        # 反序列化任务
+        task = Task(
+            id=row[0],
+            query=row[1],
+            description=row[2],
+            status=_STATUS_BY_VALUE[row[3]],
+            created_at=_us_to_dt(row[4]),
+            started_at=_us_to_dt(row[5]),
+            completed_at=_us_to_dt(row[6]),
+            metadata=_decode_json(row[9]) if row[9] else {}
+        )
+        
+        # 反序列化复杂度
+        if row[7]:
+            from ..models.task import TaskComplexity
+            complexity_data = _decode_json(row[7])
+            task.complexity = TaskComplexity(**complexity_data)
+        
+        # 反序列化旧格式中整体存储的TodoList
+        if row[8]:
+            task.todo_list = [_todo_from_data(todo_data) for todo_data in _decode_json(row[8])]
+        
+        return task
+    
+    def _todo_from_row(self, row: tuple) -> TodoItem:
+        """从todos表的一行恢复TodoItem"""
+        todo_data = _decode_json(row[9]) if row[9] else {}
+        todo_data.update(
+            id=row[1],
+            content=row[3],
+            status=row[4],
+            priority=row[5],
+            created_at=row[6],
+            started_at=row[7],
+            completed_at=row[8]
         )
+        return _todo_from_data(todo_data)
     
-    def _delete_task_state_sync(self, task_id: str) -> bool:
-        """同步删除任务状态"""
+    async def delete_task_state(self, task_id: str) -> bool:
+        """删除数据库中的任务状态"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
-                cursor.execute('DELETE FROM execution_contexts WHERE task_id = ?', (task_id,))
-                cursor.execute('DELETE FROM execution_results WHERE task_id = ?', (task_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+            conn = await self._get_connection()
+            async with self._get_tx_lock():
+                try:
+                    cursor = await conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+                    deleted = cursor.rowcount > 0
+                    await conn.execute('DELETE FROM todos WHERE task_id = ?', (task_id,))
+                    await conn.execute('DELETE FROM execution_contexts WHERE task_id = ?', (task_id,))
+                    await conn.execute('DELETE FROM execution_results WHERE task_id = ?', (task_id,))
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+                self._todo_fingerprints.pop(task_id, None)
+            return deleted
         except Exception as e:
             self.logger.error(f"删除任务状态失败: {task_id}, 错误: {e}")
             return False
@@ -394,39 +867,143 @@ class DatabaseStateStorage(StateStorage):
         limit: Optional[int] = None
     ) -> List[str]:
         """列出数据库中的任务状态"""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._list_task_states_sync, status, limit
-        )
+        try:
+            conn = await self._get_connection()
+            
+            query = 'SELECT id FROM tasks'
+            params = []
+            
+            if status:
+                query += ' WHERE status = ?'
+                params.append(status.value)
+            
+            query += ' ORDER BY created_at DESC'
+            
+            if limit:
+                query += ' LIMIT ?'
+                params.append(limit)
+            
+            # 分块遍历游标，不先把整个结果集物化为元组列表
+            async with conn.execute(query, params) as cursor:
+                return [row[0] async for row in cursor]
+                
+        except Exception as e:
+            self.logger.error(f"列出任务状态失败: {e}")
+            return []
+
+
+class LMDBStateStorage(StateStorage):
+    """
+    基于LMDB的状态存储
+    
+    所有任务保存在同一个LMDB环境中，避免逐文件open/close；读取走内存映射，可直接在事件循环中调用，
+    写事务的提交需要落盘，放到线程池中执行
+    """
+    
+    _TASK_KEY_PREFIX = b"task:"
+    
+    def __init__(self, db_path: str = "./utf_state.lmdb", map_size: int = 256 << 20):
+        try:
+            import lmdb
+        except ImportError:
+            raise ImportError("LMDB状态存储需要安装lmdb: pip install lmdb")
+        
+        self.db_path = db_path
+        self.logger = get_logger(__name__)
+        self._env = lmdb.open(db_path, map_size=map_size, subdir=True)
+        
+        self.logger.info(f"LMDBStateStorage initialized: {db_path}")
+    
+    def _task_key(self, task_id: str) -> bytes:
+        """获取任务的键"""
+        return self._TASK_KEY_PREFIX + task_id.encode('utf-8')
+    
+    async def save_task_state(self, task: Task) -> None:
+        """保存任务状态到LMDB"""
+        await self.save_prepared_task_states([(task, self.prepare_task_state(task))])
+        self.logger.debug(f"任务状态已保存: {task.id}")
+    
+    async def save_task_states_batch(self, tasks: List[Task]) -> None:
+        """在单个写事务中批量保存任务状态"""
+        await self.save_prepared_task_states([(task, self.prepare_task_state(task)) for task in tasks])
     
-    def _list_task_states_sync(
+    async def save_prepared_task_states(self, prepared: List[Tuple[Task, bytes]]) -> None:
+        """在单个写事务中写入已编码的任务状态"""
+        items = [(self._task_key(task.id), payload) for task, payload in prepared]
+        await to_thread_fast(self._put_items, items)
+    
+    def _put_items(self, items: List[Tuple[bytes, bytes]]) -> None:
+        """在单个写事务中写入键值对（阻塞调用）"""
+        with self._env.begin(write=True) as txn:
+            for key, payload in items:
+                txn.put(key, payload)
+    
+    async def load_task_state(self, task_id: str) -> Optional[Task]:
+        """从LMDB加载任务状态"""
+        with self._env.begin() as txn:
+            content = txn.get(self._task_key(task_id))
+        
+        if content is None:
+            return None
+        
+        try:
+            return _task_from_data(_decode_json(content))
+        except Exception as e:
+            self.logger.error(f"加载任务状态失败: {task_id}, 错误: {e}")
+            return None
+    
+    async def delete_task_state(self, task_id: str) -> bool:
+        """从LMDB删除任务状态"""
+        try:
+            deleted = await to_thread_fast(self._delete_key, self._task_key(task_id))
+            if deleted:
+                self.logger.debug(f"任务状态已删除: {task_id}")
+            return deleted
+        except Exception as e:
+            self.logger.error(f"删除任务状态失败: {task_id}, 错误: {e}")
+            return False
+    
+    def _delete_key(self, key: bytes) -> bool:
+        """在单个写事务中删除键（阻塞调用）"""
+        with self._env.begin(write=True) as txn:
+            return txn.delete(key)
+    
+    async def list_task_states(
         self,
         status: Optional[TaskStatus] = None,
         limit: Optional[int] = None
     ) -> List[str]:
-        """同步列出任务状态"""
+        """按键前缀遍历列出任务状态"""
+        task_ids = []
+        prefix = self._TASK_KEY_PREFIX
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                query = 'SELECT id FROM tasks'
-                params = []
-                
-                if status:
-                    query += ' WHERE status = ?'
-                    params.append(status.value)
-                
-                query += ' ORDER BY created_at DESC'
-                
-                if limit:
-                    query += ' LIMIT ?'
-                    params.append(limit)
-                
-                cursor.execute(query, params)
-                return [row[0] for row in cursor.fetchall()]
+            with self._env.begin() as txn:
+                cursor = txn.cursor()
+                if not cursor.set_range(prefix):
+                    return task_ids
                 
+                for key, value in cursor:
+                    if not key.startswith(prefix):
+                        break
+                    
+                    # 如果指定了状态过滤
+                    if status and _decode_json(value).get('status') != status.value:
+                        continue
+                    
+                    task_ids.append(key[len(prefix):].decode('utf-8'))
+                    
+                    if limit and len(task_ids) >= limit:
+                        break
+        
         except Exception as e:
             self.logger.error(f"列出任务状态失败: {e}")
-            return []
+        
+        return task_ids
+    
+    def close(self) -> None:
+        """关闭LMDB环境"""
+        self._env.close()
 
 
 class StateManager:
@@ -439,19 +1016,31 @@ class StateManager:
     def __init__(
         self,
         storage: Optional[StateStorage] = None,
-        auto_save_interval: int = 30  # 自动保存间隔(秒)
+        auto_save_interval: int = 30,  # 脏数据最长保留时间(秒)
+        cache_size: int = 1024,  # 内存中缓存的任务数上限
+        auto_save_threshold: int = 50  # 脏任务达到该数量时立即保存
     ):
         self.logger = get_logger(__name__)
         self.storage = storage or FileSystemStateStorage()
         self.auto_save_interval = auto_save_interval
+        self.cache_size = cache_size
+        self.auto_save_threshold = auto_save_threshold
         
-        # 内存缓存
-        self._cached_tasks: Dict[str, Task] = {}
+        # 内存缓存（任务缓存按LRU淘汰，尚未保存的任务不会被淘汰）
+        self._cached_tasks: "OrderedDict[str, Task]" = OrderedDict()
         self._cached_contexts: Dict[str, ExecutionContext] = {}
         
         # 自动保存任务
         self._auto_save_task: Optional[asyncio.Task] = None
-        self._dirty_tasks: set = set()  # 需要保存的任务ID
+        # 需要保存的任务，按最近修改顺序排列（直接持有Task，不依赖缓存查找）
+        self._dirty_tasks: "OrderedDict[str, Task]" = OrderedDict()
+        # task_id -> 最近一次持久化内容的指纹，内容未变化的任务跳过写入
+        self._last_saved_hash: Dict[str, int] = {}
+        
+        # 自动保存由事件触发：出现脏任务时唤醒，达到阈值或超过最长保留时间时保存
+        self._dirty_since: Optional[float] = None  # 第一个未保存任务的time.monotonic()时间戳
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._flush_event: Optional[asyncio.Event] = None
         
         self.logger.info("StateManager initialized")
     
@@ -460,6 +1049,12 @@ class StateManager:
         if self._auto_save_task and not self._auto_save_task.done():
             return
         
+        if self._dirty_event is None:
+            self._dirty_event = asyncio.Event()
+            self._flush_event = asyncio.Event()
+            if self._dirty_tasks:
+                self._dirty_event.set()
+        
         self._auto_save_task = asyncio.create_task(self._auto_save_loop())
         self.logger.info("自动保存已启动")
     
@@ -478,32 +1073,68 @@ class StateManager:
     
     async def save_task(self, task: Task, force: bool = False) -> None:
         """保存任务状态"""
-        self._cached_tasks[task.id] = task
-        
         if force:
-            await self.storage.save_task_state(task)
-            self._dirty_tasks.discard(task.id)
+            prepared = self.storage.prepare_task_state(task)
+            await self.storage.save_prepared_task_states([(task, prepared)])
+            self._dirty_tasks.pop(task.id, None)
+            self._last_saved_hash[task.id] = hash(prepared)
         else:
-            self._dirty_tasks.add(task.id)
+            self._dirty_tasks[task.id] = task
+            self._dirty_tasks.move_to_end(task.id)
+            self._notify_dirty()
+            if len(self._dirty_tasks) >= self.auto_save_threshold and self._flush_event is not None:
+                self._flush_event.set()
+        
+        self._cache_task(task)
+    
+    def _notify_dirty(self) -> None:
+        """记录第一个脏任务出现的时间并唤醒自动保存循环"""
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+            if self._dirty_event is not None:
+                self._dirty_event.set()
     
     async def load_task(self, task_id: str) -> Optional[Task]:
         """加载任务状态"""
         # 先检查缓存
-        if task_id in self._cached_tasks:
-            return self._cached_tasks[task_id]
+        task = self._cached_tasks.get(task_id)
+        if task is not None:
+            self._cached_tasks.move_to_end(task_id)
+            return task
         
         # 从存储加载
         task = await self.storage.load_task_state(task_id)
         if task:
-            self._cached_tasks[task_id] = task
+            self._cache_task(task)
         
         return task
     
+    def _cache_task(self, task: Task) -> None:
+        """将任务放入缓存，超出上限时淘汰最久未使用且已保存的任务"""
+        self._cached_tasks[task.id] = task
+        self._cached_tasks.move_to_end(task.id)
+        
+        excess = len(self._cached_tasks) - self.cache_size
+        if excess <= 0:
+            return
+        
+        evicted = []
+        for task_id in self._cached_tasks:
+            if task_id not in self._dirty_tasks:
+                evicted.append(task_id)
+                if len(evicted) >= excess:
+                    break
+        
+        for task_id in evicted:
+            del self._cached_tasks[task_id]
+            self._last_saved_hash.pop(task_id, None)
+    
     async def delete_task(self, task_id: str) -> bool:
         """删除任务状态"""
         # 从缓存删除
         self._cached_tasks.pop(task_id, None)
-        self._dirty_tasks.discard(task_id)
+        self._dirty_tasks.pop(task_id, None)
+        self._last_saved_hash.pop(task_id, None)
         
         # 从存储删除
         return await self.storage.delete_task_state(task_id)
@@ -563,10 +1194,22 @@ class StateManager:
         return suggestions
     
     async def _auto_save_loop(self) -> None:
-        """自动保存循环"""
+        """自动保存循环（没有脏任务时不会被唤醒）"""
         while True:
             try:
-                await asyncio.sleep(self.auto_save_interval)
+                await self._dirty_event.wait()
+                
+                # 等到脏任务数达到阈值，或第一个脏任务已保留auto_save_interval秒
+                if self._dirty_since is not None and not self._flush_event.is_set():
+                    remaining = self._dirty_since + self.auto_save_interval - time.monotonic()
+                    if remaining > 0:
+                        try:
+                            async with timeout_after(remaining):
+                                await self._flush_event.wait()
+                        except asyncio.TimeoutError:
+                            pass
+                
+                self._dirty_event.clear()
                 await self._save_dirty_tasks()
             except asyncio.CancelledError:
                 break
@@ -575,23 +1218,42 @@ class StateManager:
     
     async def _save_dirty_tasks(self) -> None:
         """保存脏任务"""
+        self._dirty_since = None
+        if self._flush_event is not None:
+            self._flush_event.clear()
+        
         if not self._dirty_tasks:
             return
         
-        dirty_task_ids = list(self._dirty_tasks)
-        self._dirty_tasks.clear()
+        dirty_tasks = self._dirty_tasks
+        self._dirty_tasks = OrderedDict()
         
-        for task_id in dirty_task_ids:
-            if task_id in self._cached_tasks:
-                try:
-                    await self.storage.save_task_state(self._cached_tasks[task_id])
-                except Exception as e:
-                    self.logger.error(f"保存任务失败: {task_id}, 错误: {e}")
-                    # 重新标记为脏数据
-                    self._dirty_tasks.add(task_id)
-        
-        if dirty_task_ids:
-            self.logger.debug(f"自动保存了 {len(dirty_task_ids)} 个任务")
+        # 每个任务只编码一次：用编码结果的哈希跳过内容未变化的任务，变化的任务直接写入该结果
+        fingerprints = {}
+        changed_tasks = []
+        for task_id, task in dirty_tasks.items():
+            prepared = self.storage.prepare_task_state(task)
+            fingerprint = hash(prepared)
+            if self._last_saved_hash.get(task_id) != fingerprint:
+                fingerprints[task_id] = fingerprint
+                changed_tasks.append((task, prepared))
+        
+        if not changed_tasks:
+            return
+        
+        try:
+            await self.storage.save_prepared_task_states(changed_tasks)
+        except Exception as e:
+            self.logger.error(f"批量保存任务失败: {len(changed_tasks)} 个任务, 错误: {e}")
+            # 重新标记为脏数据（保存期间再次修改的任务保留较新的位置）
+            for task, _ in changed_tasks:
+                self._dirty_tasks.setdefault(task.id, task)
+            # 失败的任务在下一个保留周期后重试，不因达到阈值而立即重试
+            self._notify_dirty()
+            return
+        
+        self._last_saved_hash.update(fingerprints)
+        self.logger.debug(f"自动保存了 {len(changed_tasks)} 个任务")
 
 
 # 全局状态管理器实例
@@ -4,15 +4,74 @@
 负责分析任务复杂度并将复杂任务分解为可执行的TodoItem列表
 """
 
-import uuid
+import functools
+import heapq
 import re
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import List, Dict, Any, Optional, Set, FrozenSet, Tuple
 from datetime import datetime
 
 from ..config.settings import FrameworkConfig
 from ..models.task import Task, TodoItem, TaskComplexity, TaskStatus
 from ..models.execution import ExecutionContext
 from ..utils.logging import get_logger
+from ..utils.ids import new_id
+
+
+# 关键词分组（工具识别和任务分类按顺序匹配，先匹配的优先）
+_ACTION_WORDS = ['分析', '创建', '生成', '搜索', '下载', '上传', '处理', '转换']
+_LOGICAL_CONNECTORS = ['然后', '接着', '之后', '并且', '同时', 'and', 'then', 'after']
+_TOOL_KEYWORDS = [
+    (['文件', '读取', '写入', '保存', 'file'], ['file_read', 'file_write']),  # 文件操作
+    (['搜索', '下载', '获取', '请求', 'search', 'fetch'], ['web_request']),  # 网络请求
+    (['分析', '处理', '转换', 'analyze', 'process'], ['data_processing']),  # 数据处理
+    (['执行', '运行', '命令', 'execute', 'run'], ['system_command']),  # 系统操作
+]
+_TASK_TYPE_KEYWORDS = [
+    (['分析', '研究', 'analyze', 'research'], 'analysis'),
+    (['创建', '生成', '建立', 'create', 'generate'], 'creation'),
+    (['搜索', '查找', '获取', 'search', 'find'], 'information_gathering'),
+    (['处理', '转换', '修改', 'process', 'convert'], 'data_processing'),
+]
+
+# 没有命中任何关键词时共用的扫描结果（只读）
+_NO_HITS: Dict[str, FrozenSet[Any]] = {
+    'complexity': frozenset(), 'action': frozenset(), 'connector': frozenset(),
+    'tools': frozenset(), 'task_type': frozenset()
+}
+
+
+def _overlapping_keyword_pattern(keywords: List[str]) -> "re.Pattern[str]":
+    """编译可用findall找出所有（包括相互重叠的）关键词出现位置的正则"""
+    alternation = "|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+    return re.compile(f"(?=({alternation}))", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_keyword_scanner(tagged_keywords: Tuple[Tuple[str, Tuple[str, Any]], ...]) -> Tuple["re.Pattern[str]", Dict[str, tuple]]:
+    """
+    将所有分组的关键词合并为一个正则
+    
+    按关键词定义缓存，规则相同的TaskDecomposer实例共享同一份正则和标记表（调用方不得修改返回值）
+    
+    Returns:
+        (正则, 小写关键词 -> (类别, 标记)元组)
+    """
+    keyword_tags: Dict[str, set] = {}
+    for keyword, tag in tagged_keywords:
+        keyword_tags.setdefault(keyword.lower(), set()).add(tag)
+    
+    # 同一位置只会匹配到最长的关键词，它的标记需要包含作为其前缀的较短关键词的标记
+    closed_tags = {
+        keyword: tuple(
+            tag
+            for other, other_tags in keyword_tags.items() if keyword.startswith(other)
+            for tag in other_tags
+        )
+        for keyword in keyword_tags
+    }
+    return _overlapping_keyword_pattern(list(keyword_tags)), closed_tags
 
 
 class TaskDecomposer:
@@ -26,11 +85,45 @@ class TaskDecomposer:
         self.config = config
         self.logger = get_logger(__name__)
         
-        # 复杂度分析规则
-        self._complexity_rules = self._init_complexity_rules()
+        # 复杂度分析规则（拆分为按规则下标对齐的关键词和加分两个数组，关键词统一转为小写）
+        complexity_rules = self._init_complexity_rules()
+        self._rule_keywords: List[FrozenSet[str]] = [
+            frozenset(keyword.lower() for keyword in rule['keywords']) for rule in complexity_rules
+        ]
+        self._rule_scores: Tuple[int, ...] = tuple(rule['score_increment'] for rule in complexity_rules)
+        
+        # 所有关键词合并为一个正则，一次扫描得到全部分组的命中
+        self._keyword_pattern, self._keyword_tags = _build_keyword_scanner(tuple(
+            [(keyword, ('complexity', i)) for i, keywords in enumerate(self._rule_keywords) for keyword in sorted(keywords)]
+            + [(keyword, ('action', keyword.lower())) for keyword in _ACTION_WORDS]
+            + [(keyword, ('connector', keyword.lower())) for keyword in _LOGICAL_CONNECTORS]
+            + [(keyword, ('tools', i)) for i, (keywords, _) in enumerate(_TOOL_KEYWORDS) for keyword in keywords]
+            + [(keyword, ('task_type', i)) for i, (keywords, _) in enumerate(_TASK_TYPE_KEYWORDS) for keyword in keywords]
+        ))
         
         # 任务分解模板
         self._decomposition_templates = self._init_decomposition_templates()
+        
+        # 预处理后的模板步骤：(以"{query}"切分的内容片段, 工具, 优先级, 预计耗时)
+        self._compiled_templates: Dict[str, List[Tuple[Tuple[str, ...], Tuple[str, ...], int, int]]] = {
+            task_type: [
+                (
+                    tuple(step['content'].split('{query}')),
+                    tuple(step.get('tools', [])),
+                    step.get('priority', 0),
+                    step.get('duration', 60)
+                )
+                for step in steps
+            ]
+            for task_type, steps in self._decomposition_templates.items()
+        }
+        
+        # 复杂度分析缓存（按归一化查询哈希和相关配置的LRU）
+        self._complexity_cache: "OrderedDict[Tuple[str, int, int], TaskComplexity]" = OrderedDict()
+        self._complexity_cache_size = config.cache.complexity_cache_size
+    
+    # 以下公开方法均为纯CPU计算，async版本只是保持原有接口，实际逻辑在对应的_sync方法中，
+    # 同步调用方可直接使用_sync方法，省去协程对象的创建和调度
     
     async def analyze_complexity(self, user_query: str) -> TaskComplexity:
         """
@@ -42,13 +135,25 @@ class TaskDecomposer:
         Returns:
             TaskComplexity: 复杂度分析结果
         """
+        return self._analyze_complexity_sync(user_query)
+    
+    def _analyze_complexity_sync(self, user_query: str) -> TaskComplexity:
+        """分析任务复杂度（同步实现）"""
+        cache_key = self._query_cache_key(user_query)
+        cached = self._complexity_cache.get(cache_key)
+        if cached is not None:
+            self._complexity_cache.move_to_end(cache_key)
+            return cached.model_copy(deep=True)
+        
         self.logger.info(f"分析任务复杂度: {user_query}")
         
         # 基于规则的复杂度分析
-        score = self._calculate_complexity_score(user_query)
+        hits = self._scan_query(user_query)
+        score = self._calculate_complexity_score(user_query, hits)
         needs_todo_list = score >= self.config.task.complexity_threshold
-        estimated_steps = self._estimate_steps(user_query, score)
-        required_tools = self._identify_required_tools(user_query)
+        estimated_steps = self._estimate_steps(hits, score)
+        # 简单查询通常不含任何关键词，此时无需识别工具
+        required_tools = self._identify_required_tools(hits) if hits is not _NO_HITS else []
         reasoning = self._generate_reasoning(user_query, score, needs_todo_list)
         
         complexity = TaskComplexity(
@@ -56,12 +161,28 @@ class TaskDecomposer:
             needs_todo_list=needs_todo_list,
             estimated_steps=estimated_steps,
             required_tools=required_tools,
-            reasoning=reasoning
+            reasoning=reasoning,
+            task_type=self._classify_task_type(hits)
         )
         
         self.logger.info(f"复杂度分析完成: score={score}, needs_todo={needs_todo_list}")
+        
+        if self._complexity_cache_size > 0:
+            self._complexity_cache[cache_key] = complexity.model_copy(deep=True)
+            if len(self._complexity_cache) > self._complexity_cache_size:
+                self._complexity_cache.popitem(last=False)
+        
         return complexity
     
+    def _query_cache_key(self, user_query: str) -> Tuple[str, int, int]:
+        """生成缓存键（归一化查询哈希 + 影响分析结果的配置项，配置修改后不会命中旧结果）"""
+        task_config = self.config.task
+        return (
+            blake2b(user_query.strip().lower().encode('utf-8'), digest_size=16).hexdigest(),
+            task_config.complexity_threshold,
+            task_config.max_todo_items
+        )
+    
     async def decompose_task(
         self,
         task: Task,
@@ -77,21 +198,25 @@ class TaskDecomposer:
         Returns:
             List[TodoItem]: TodoItem列表
         """
+        return self._decompose_task_sync(task, context)
+    
+    def _decompose_task_sync(self, task: Task, context: ExecutionContext) -> List[TodoItem]:
+        """分解任务为TodoItem列表（同步实现）"""
         self.logger.info(f"开始分解任务: {task.id}")
         
         if not task.complexity or not task.complexity.needs_todo_list:
             # 简单任务不需要分解
             return []
         
-        # 根据任务类型选择分解策略
-        task_type = self._classify_task_type(task.query)
-        todos = await self._decompose_by_type(task, task_type, context)
+        # 根据任务类型选择分解策略（复杂度分析已得出类型时不再重新扫描查询）
+        task_type = task.complexity.task_type or self._classify_task_type(self._scan_query(task.query))
+        todos = self._decompose_by_type(task, task_type, context)
         
-        # 分析依赖关系
-        todos = self._analyze_dependencies(todos)
+        # 分析依赖关系并设置优先级
+        todos = self._finalize_todos(todos)
         
-        # 设置优先级
-        todos = self._set_priorities(todos)
+        # 按依赖关系排序，同层内优先级高的在前
+        todos = self._topological_sort(todos)
         
         self.logger.info(f"任务分解完成: {len(todos)} 个TodoItem")
         return todos
@@ -104,6 +229,8 @@ class TaskDecomposer:
         """
         根据用户反馈更新TodoList
         
+        current_todos中的TodoItem会被原地修改（内容、优先级、依赖），列表本身不会被修改
+        
         Args:
             current_todos: 当前TodoList
             user_feedback: 用户反馈
@@ -111,35 +238,48 @@ class TaskDecomposer:
         Returns:
             List[TodoItem]: 更新后的TodoList
         """
+        return self._update_todo_list_sync(current_todos, user_feedback)
+    
+    def _update_todo_list_sync(
+        self,
+        current_todos: List[TodoItem],
+        user_feedback: Dict[str, Any]
+    ) -> List[TodoItem]:
+        """根据用户反馈更新TodoList（同步实现）"""
         self.logger.info("根据用户反馈更新TodoList")
         
         # 这里可以实现更复杂的更新逻辑
         # 例如：添加新步骤、修改现有步骤、调整优先级等
         
-        updated_todos = current_todos.copy()
+        # 不复制current_todos：没有新增或删除时直接在原列表上分析，
+        # 拓扑排序总会返回新列表，调用方传入的列表本身不会被修改
+        updated_todos = current_todos
         
         if 'add_steps' in user_feedback:
             # 添加新步骤
-            for step in user_feedback['add_steps']:
-                new_todo = TodoItem(
-                    id=str(uuid.uuid4()),
+            updated_todos = updated_todos + [
+                TodoItem(
+                    id=new_id(),
                     content=step['content'],
                     tools_needed=step.get('tools', []),
                     priority=step.get('priority', 0)
                 )
-                updated_todos.append(new_todo)
+                for step in user_feedback['add_steps']
+            ]
         
         if 'modify_steps' in user_feedback:
-            # 修改现有步骤
+            # 修改现有步骤（ID重复时与逐个查找一样只修改第一个）
+            todos_by_id: Dict[str, TodoItem] = {}
+            for todo in updated_todos:
+                todos_by_id.setdefault(todo.id, todo)
+            
             for modification in user_feedback['modify_steps']:
-                todo_id = modification['id']
-                for todo in updated_todos:
-                    if todo.id == todo_id:
-                        if 'content' in modification:
-                            todo.content = modification['content']
-                        if 'priority' in modification:
-                            todo.priority = modification['priority']
-                        break
+                todo = todos_by_id.get(modification['id'])
+                if todo is not None:
+                    if 'content' in modification:
+                        todo.content = modification['content']
+                    if 'priority' in modification:
+                        todo.priority = modification['priority']
         
         if 'remove_steps' in user_feedback:
             # 移除步骤
@@ -147,74 +287,69 @@ class TaskDecomposer:
             updated_todos = [todo for todo in updated_todos if todo.id not in remove_ids]
         
         # 重新分析依赖关系
-        updated_todos = self._analyze_dependencies(updated_todos)
+        updated_todos = self._finalize_todos(updated_todos, adjust_priorities=False)
         
-        return updated_todos
+        return self._topological_sort(updated_todos)
+    
+    def _scan_query(self, user_query: str) -> Dict[str, Set[Any]]:
+        """单次扫描查询，按类别返回命中的关键词分组"""
+        matched_keywords = self._keyword_pattern.findall(user_query)
+        if not matched_keywords:
+            return _NO_HITS
+        
+        hits: Dict[str, Set[Any]] = {
+            'complexity': set(), 'action': set(), 'connector': set(), 'tools': set(), 'task_type': set()
+        }
+        keyword_tags = self._keyword_tags
+        for keyword in set(matched_keywords):
+            # 命中的关键词绝大多数已是小写（中文或小写英文），只在查不到时才转换大小写
+            tags = keyword_tags.get(keyword) or keyword_tags.get(keyword.lower(), ())
+            for category, tag in tags:
+                hits[category].add(tag)
+        return hits
     
-    def _calculate_complexity_score(self, user_query: str) -> int:
+    def _calculate_complexity_score(self, user_query: str, hits: Dict[str, Set[Any]]) -> int:
         """计算复杂度评分"""
         score = 1  # 基础分数
         
-        query_lower = user_query.lower()
-        
         # 基于关键词的评分
-        for rule in self._complexity_rules:
-            if any(keyword in query_lower for keyword in rule['keywords']):
-                score += rule['score_increment']
+        rule_scores = self._rule_scores
+        for rule_index in hits['complexity']:
+            score += rule_scores[rule_index]
         
-        # 基于查询长度的评分
-        word_count = len(user_query.split())
+        # 基于查询长度的评分（只需区分是否超过10/20个词，最多切分20次，长查询不会切出整个词列表）
+        word_count = len(user_query.split(None, 20))
         if word_count > 20:
             score += 2
         elif word_count > 10:
             score += 1
         
-        # 基于逻辑连接词的评分
-        logical_connectors = ['然后', '接着', '之后', '并且', '同时', 'and', 'then', 'after']
-        connector_count = sum(1 for connector in logical_connectors if connector in query_lower)
-        score += connector_count
+        # 基于逻辑连接词的评分（每种连接词计一次）
+        score += len(hits['connector'])
         
-        # 限制评分范围
-        return min(max(score, 1), 10)
+        # 限制评分范围（基础分为1且各项加分均非负，只需限制上限）
+        return score if score < 10 else 10
     
-    def _estimate_steps(self, user_query: str, complexity_score: int) -> int:
+    def _estimate_steps(self, hits: Dict[str, Set[Any]], complexity_score: int) -> int:
         """估算步骤数"""
         # 基础步骤数基于复杂度
         base_steps = max(1, complexity_score // 2)
         
-        # 根据查询内容调整
-        query_lower = user_query.lower()
-        
-        # 检查是否包含多个动作
-        action_words = ['分析', '创建', '生成', '搜索', '下载', '上传', '处理', '转换']
-        action_count = sum(1 for word in action_words if word in query_lower)
+        # 检查是否包含多个动作（每种动作计一次）
+        action_count = len(hits['action'])
         
         estimated_steps = base_steps + action_count
         
         return min(estimated_steps, self.config.task.max_todo_items)
     
-    def _identify_required_tools(self, user_query: str) -> List[str]:
-        """识别需要的工具类型"""
-        query_lower = user_query.lower()
-        required_tools = []
-        
-        # 文件操作
-        if any(keyword in query_lower for keyword in ['文件', '读取', '写入', '保存', 'file']):
-            required_tools.extend(['file_read', 'file_write'])
-        
-        # 网络请求
-        if any(keyword in query_lower for keyword in ['搜索', '下载', '获取', '请求', 'search', 'fetch']):
-            required_tools.append('web_request')
+    def _identify_required_tools(self, hits: Dict[str, Set[Any]]) -> List[str]:
+        """识别需要的工具类型（按分组定义顺序去重，结果稳定）"""
+        required_tools: Dict[str, None] = {}
         
-        # 数据处理
-        if any(keyword in query_lower for keyword in ['分析', '处理', '转换', 'analyze', 'process']):
-            required_tools.append('data_processing')
+        for group_index in sorted(hits['tools']):
+            required_tools.update(dict.fromkeys(_TOOL_KEYWORDS[group_index][1]))
         
-        # 系统操作
-        if any(keyword in query_lower for keyword in ['执行', '运行', '命令', 'execute', 'run']):
-            required_tools.append('system_command')
-        
-        return list(set(required_tools))
+        return list(required_tools)
     
     def _generate_reasoning(
         self,
@@ -239,22 +374,14 @@ class TaskDecomposer:
         
         return "，".join(reasoning_parts)
     
-    def _classify_task_type(self, user_query: str) -> str:
-        """分类任务类型"""
-        query_lower = user_query.lower()
-        
-        if any(keyword in query_lower for keyword in ['分析', '研究', 'analyze', 'research']):
-            return 'analysis'
-        elif any(keyword in query_lower for keyword in ['创建', '生成', '建立', 'create', 'generate']):
-            return 'creation'
-        elif any(keyword in query_lower for keyword in ['搜索', '查找', '获取', 'search', 'find']):
-            return 'information_gathering'
-        elif any(keyword in query_lower for keyword in ['处理', '转换', '修改', 'process', 'convert']):
-            return 'data_processing'
-        else:
-            return 'general'
+    def _classify_task_type(self, hits: Dict[str, Set[Any]]) -> str:
+        """分类任务类型（命中多个分组时取靠前的分组）"""
+        if hits['task_type']:
+            return _TASK_TYPE_KEYWORDS[min(hits['task_type'])][1]
+        
+        return 'general'
     
-    async def _decompose_by_type(
+    def _decompose_by_type(
         self,
         task: Task,
         task_type: str,
@@ -262,62 +389,110 @@ class TaskDecomposer:
     ) -> List[TodoItem]:
         """根据任务类型分解"""
         
-        decomposition_template = self._decomposition_templates.get(
+        decomposition_template = self._compiled_templates.get(
             task_type,
-            self._decomposition_templates['general']
+            self._compiled_templates['general']
         )
         
-        todos = []
-        
-        for i, step_template in enumerate(decomposition_template):
-            todo = TodoItem(
-                id=str(uuid.uuid4()),
-                content=step_template['content'].format(query=task.query),
-                tools_needed=step_template.get('tools', []),
-                priority=step_template.get('priority', 0),
-                estimated_duration=step_template.get('duration', 60)
+        query = task.query
+        return [
+            TodoItem(
+                id=new_id(),
+                content=query.join(content_parts),
+                tools_needed=list(tools),
+                priority=priority,
+                estimated_duration=duration
             )
-            todos.append(todo)
-        
-        return todos
+            for content_parts, tools, priority, duration in decomposition_template
+        ]
     
-    def _analyze_dependencies(self, todos: List[TodoItem]) -> List[TodoItem]:
-        """分析TodoItem之间的依赖关系"""
+    def _finalize_todos(self, todos: List[TodoItem], adjust_priorities: bool = True) -> List[TodoItem]:
+        """
+        分析TodoItem之间的依赖关系，并（可选）设置优先级
+        
+        依赖只来自前面的步骤，遍历到某个步骤时它的依赖已经确定，因此两者在同一次遍历中完成
+        """
         # 简单的依赖分析：基于工具类型和内容
+        # 单次正向遍历，记录到目前为止的文件读取和数据获取步骤，不再为每个步骤回扫之前的步骤
+        file_read_ids: List[str] = []
+        data_source_ids: List[str] = []
         
-        for i, todo in enumerate(todos):
+        for todo in todos:
+            tools = todo.tools_needed
+            writes_file = 'file_write' in tools
+            reads_file = 'file_read' in tools
+            requests_web = 'web_request' in tools
+            
             # 文件写入通常依赖于文件读取
-            if 'file_write' in todo.tools_needed:
-                for j, prev_todo in enumerate(todos[:i]):
-                    if 'file_read' in prev_todo.tools_needed:
-                        todo.dependencies.append(prev_todo.id)
+            new_dep_ids = file_read_ids if writes_file else []
             
             # 数据处理通常依赖于数据获取
-            if 'data_processing' in todo.tools_needed:
-                for j, prev_todo in enumerate(todos[:i]):
-                    if 'web_request' in prev_todo.tools_needed or 'file_read' in prev_todo.tools_needed:
-                        todo.dependencies.append(prev_todo.id)
+            if 'data_processing' in tools:
+                new_dep_ids = new_dep_ids + data_source_ids
+            
+            # 只追加尚未存在的依赖（同一步骤可能既是文件读取又是数据获取，重新分析时依赖也已存在）
+            if new_dep_ids:
+                dependencies = todo.dependencies
+                known_ids = set(dependencies)
+                for dep_id in new_dep_ids:
+                    if dep_id not in known_ids:
+                        known_ids.add(dep_id)
+                        dependencies.append(dep_id)
+            
+            if reads_file:
+                file_read_ids.append(todo.id)
+                data_source_ids.append(todo.id)
+            elif requests_web:
+                data_source_ids.append(todo.id)
+            
+            if adjust_priorities:
+                # 无依赖的优先级更高
+                if not todo.dependencies:
+                    todo.priority += 10
+                
+                # 数据收集类任务优先级更高
+                if reads_file or requests_web:
+                    todo.priority += 5
+                
+                # 输出类任务优先级较低
+                if writes_file:
+                    todo.priority -= 5
         
         return todos
     
-    def _set_priorities(self, todos: List[TodoItem]) -> List[TodoItem]:
-        """设置TodoItem优先级"""
+    def _topological_sort(self, todos: List[TodoItem]) -> List[TodoItem]:
+        """
+        按依赖关系对TodoItem做拓扑排序（Kahn算法）
         
-        # 基于依赖关系和工具类型设置优先级
-        for todo in todos:
-            # 无依赖的优先级更高
-            if not todo.dependencies:
-                todo.priority += 10
-            
-            # 数据收集类任务优先级更高
-            if any(tool in todo.tools_needed for tool in ['web_request', 'file_read']):
-                todo.priority += 5
-            
-            # 输出类任务优先级较低
-            if any(tool in todo.tools_needed for tool in ['file_write']):
-                todo.priority -= 5
+        入度为0的TodoItem按(优先级降序, 原始位置)出队；不在列表中的依赖ID忽略，
+        存在循环依赖时剩余的TodoItem按原始顺序追加在末尾
+        """
+        index_by_id = {todo.id: i for i, todo in enumerate(todos)}
+        indegree = [0] * len(todos)
+        children: List[List[int]] = [[] for _ in todos]
         
-        return todos
+        for i, todo in enumerate(todos):
+            for dep_index in {index_by_id[dep_id] for dep_id in todo.dependencies if dep_id in index_by_id}:
+                indegree[i] += 1
+                children[dep_index].append(i)
+        
+        heap = [(-todo.priority, i) for i, todo in enumerate(todos) if indegree[i] == 0]
+        heapq.heapify(heap)
+        
+        ordered = []
+        while heap:
+            i = heapq.heappop(heap)[1]
+            ordered.append(todos[i])
+            for child in children[i]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    heapq.heappush(heap, (-todos[child].priority, child))
+        
+        if len(ordered) < len(todos):
+            self.logger.warning(f"TodoList存在循环依赖: {len(todos) - len(ordered)} 个TodoItem无法排序")
+            ordered.extend(todo for i, todo in enumerate(todos) if indegree[i] > 0)
+        
+        return ordered
     
     def _init_complexity_rules(self) -> List[Dict[str, Any]]:
         """初始化复杂度分析规则"""
@@ -5,14 +5,20 @@
 """
 
 import asyncio
+import heapq
+import inspect
 import time
+from collections import defaultdict, deque
 from enum import Enum
-from typing import Dict, List, Optional, Any, Set, Callable
-from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, Optional, Any, Set, Callable, Awaitable, Deque, Iterable, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
 from ..models.tool import Tool, ToolDefinition
 from ..utils.logging import get_logger
+from ..utils.async_ext import timeout_after
+from ..utils.dataclass_ext import DATACLASS_SLOTS
 
 
 class ToolState(Enum):
@@ -28,7 +34,11 @@ class ToolState(Enum):
     UNLOADED = "unloaded"           # 已卸载
 
 
-@dataclass
+# 周期性健康检查覆盖的工具状态
+_CHECKABLE_STATES = frozenset({ToolState.READY, ToolState.UNAVAILABLE, ToolState.ERROR})
+
+
+@dataclass(**DATACLASS_SLOTS)
 class ToolHealthStatus:
     """工具健康状态"""
     tool_name: str
@@ -37,12 +47,21 @@ class ToolHealthStatus:
     response_time: float
     error_count: int
     success_count: int
-    uptime: timedelta
     last_error: Optional[str] = None
     metadata: Dict[str, Any] = None
+    start_monotonic: float = field(default_factory=time.monotonic)  # 注册时间(time.monotonic)，用于计算运行时长
+    next_check_at: float = 0.0  # 下次周期性检查的时间(time.monotonic)
+    backoff: float = 1.0  # 检查间隔的退避倍数，连续失败时翻倍
+    _last_result: bool = field(default=False, init=False, repr=False, compare=False)  # 最近一次检查结果
+    _last_result_at: float = field(default=0.0, init=False, repr=False, compare=False)  # 最近一次检查完成时间(time.monotonic)
+    
+    @property
+    def uptime(self) -> timedelta:
+        """自注册以来的运行时长（访问时计算）"""
+        return timedelta(seconds=time.monotonic() - self.start_monotonic)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ToolLifecycleEvent:
     """工具生命周期事件"""
     tool_name: str
@@ -53,6 +72,24 @@ class ToolLifecycleEvent:
     data: Dict[str, Any] = None
 
 
+@dataclass(**DATACLASS_SLOTS)
+class _ToolSlot:
+    """注册时解析好的工具可选生命周期方法（工具未实现时为None）"""
+    tool: Tool
+    initialize: Optional[Callable[[], Awaitable[Any]]]
+    cleanup: Optional[Callable[[], Awaitable[Any]]]
+    health_check: Optional[Callable[[], Awaitable[bool]]]
+    
+    @classmethod
+    def from_tool(cls, tool: Tool) -> "_ToolSlot":
+        return cls(
+            tool=tool,
+            initialize=getattr(tool, 'initialize', None),
+            cleanup=getattr(tool, 'cleanup', None),
+            health_check=getattr(tool, 'health_check', None)
+        )
+
+
 class ToolLifecycleManager:
     """
     工具生命周期管理器
@@ -60,28 +97,71 @@ class ToolLifecycleManager:
     管理工具的完整生命周期，包括注册、初始化、监控、卸载等
     """
     
+    # 保留的生命周期事件数（全局以及每个工具/事件类型的索引）
+    _MAX_LIFECYCLE_EVENTS = 1000
+    _MAX_INDEXED_EVENTS = 500
+    # 分发任务每批最多处理的事件数
+    _DISPATCH_BATCH_SIZE = 64
+    # 健康检查失败时检查间隔的最大退避倍数
+    _MAX_HEALTH_BACKOFF = 8.0
+    
     def __init__(self, health_check_interval: int = 60):
         self.logger = get_logger(__name__)
         
         # 工具注册表
         self._tools: Dict[str, Tool] = {}
+        self._tool_slots: Dict[str, _ToolSlot] = {}
+        # 工具名快照，仅在注册表变化后重建
+        self._tool_names_snapshot: Tuple[str, ...] = ()
+        self._tool_names_dirty = False
         self._tool_states: Dict[str, ToolState] = {}
+        # 按状态索引的工具名（dict保持进入该状态的先后顺序，输出顺序确定），随状态变更增量维护
+        self._tools_by_state: Dict[ToolState, Dict[str, None]] = {state: {} for state in ToolState}
+        self._ready_tools: Dict[str, None] = self._tools_by_state[ToolState.READY]
+        # 每个工具名首次出现时分配固定的位，就绪工具的位组成_ready_mask
+        self._tool_bits: Dict[str, int] = {}
+        self._ready_mask = 0
         self._tool_metadata: Dict[str, Dict[str, Any]] = {}
         
         # 健康状态
         self._health_status: Dict[str, ToolHealthStatus] = {}
         self._health_check_interval = health_check_interval
         self._health_check_task: Optional[asyncio.Task] = None
+        # 并发健康检查的上限，信号量在首次检查时创建以绑定到运行中的事件循环
+        self._health_check_concurrency = 16
+        self._health_sem: Optional[asyncio.Semaphore] = None
+        # force_health_check在该时长(秒)内复用最近一次检查结果，避免短时间内重复探测
+        self._health_result_ttl = 0.5
+        # 按下次检查时间排序的小顶堆 (next_check_at, tool_name)，
+        # 与健康状态中的next_check_at不一致的条目视为过期并跳过
+        self._health_schedule: List[Tuple[float, str]] = []
+        self._schedule_event: Optional[asyncio.Event] = None
+        # 所有已注册工具的健康检查成功/失败次数之和，随检查结果增量更新
+        self._total_success = 0
+        self._total_errors = 0
         
-        # 生命周期事件
-        self._lifecycle_events: List[ToolLifecycleEvent] = []
-        self._event_callbacks: List[Callable[[ToolLifecycleEvent], None]] = []
+        # 生命周期事件（定长deque，超出后自动丢弃最旧的事件）
+        self._lifecycle_events: Deque[ToolLifecycleEvent] = deque(maxlen=self._MAX_LIFECYCLE_EVENTS)
+        # 按工具名和事件类型索引的最近事件，按条件查询时无需扫描全部事件
+        self._events_by_tool: Dict[str, Deque[ToolLifecycleEvent]] = defaultdict(
+            lambda: deque(maxlen=self._MAX_INDEXED_EVENTS)
+        )
+        self._events_by_type: Dict[str, Deque[ToolLifecycleEvent]] = defaultdict(
+            lambda: deque(maxlen=self._MAX_INDEXED_EVENTS)
+        )
+        # 回调很少增加而每个事件都要遍历，使用元组以便无需拷贝即可安全遍历
+        self._event_callbacks: Tuple[Callable[[ToolLifecycleEvent], Any], ...] = ()
+        # 回调由独立的分发任务执行，发出事件时只需入队（队列与任务在首次使用时创建）
+        self._event_bus: Optional[asyncio.Queue] = None
+        self._dispatcher_task: Optional[asyncio.Task] = None
         
         # 工具依赖关系
         self._tool_dependencies: Dict[str, Set[str]] = {}
         self._reverse_dependencies: Dict[str, Set[str]] = {}
+        # 各工具全部依赖对应的位掩码，依赖就绪检查只需一次位运算
+        self._required_masks: Dict[str, int] = {}
         
-        # 并发控制
+        # 并发控制（每个工具的锁在首次初始化/卸载时创建）
         self._tool_locks: Dict[str, asyncio.Lock] = {}
         
         self.logger.info("ToolLifecycleManager initialized")
@@ -106,36 +186,46 @@ class ToolLifecycleManager:
         tool_name = tool.definition.name
         
         if tool_name in self._tools:
-            self.logger.warning(f"工具已存在，将覆盖: {tool_name}")
+            self.logger.warning("工具已存在，将覆盖: %s", tool_name)
+        
+        # 在修改任何状态之前拒绝会形成循环依赖的注册
+        if dependencies and self._creates_dependency_cycle(tool_name, dependencies):
+            self.logger.error("注册工具失败: %s, 错误: 存在循环依赖 %s", tool_name, dependencies)
+            return False
         
         try:
             # 更新状态
             old_state = self._tool_states.get(tool_name)
-            self._tool_states[tool_name] = ToolState.REGISTERED
+            self._set_state(tool_name, ToolState.REGISTERED)
             
             # 注册工具
             self._tools[tool_name] = tool
+            self._tool_names_dirty = True
+            self._tool_slots[tool_name] = _ToolSlot.from_tool(tool)
             self._tool_metadata[tool_name] = metadata or {}
-            self._tool_locks[tool_name] = asyncio.Lock()
             
             # 处理依赖关系
             if dependencies:
                 self._tool_dependencies[tool_name] = set(dependencies)
+                required_mask = 0
                 for dep_name in dependencies:
+                    required_mask |= self._tool_bit(dep_name)
                     if dep_name not in self._reverse_dependencies:
                         self._reverse_dependencies[dep_name] = set()
                     self._reverse_dependencies[dep_name].add(tool_name)
+                self._required_masks[tool_name] = required_mask
             
-            # 创建健康状态记录
+            # 创建健康状态记录（覆盖注册时旧记录的计数不再计入总数）
+            self._discard_health_status(tool_name)
             self._health_status[tool_name] = ToolHealthStatus(
                 tool_name=tool_name,
                 state=ToolState.REGISTERED,
                 last_check_time=datetime.now(),
                 response_time=0.0,
                 error_count=0,
-                success_count=0,
-                uptime=timedelta()
+                success_count=0
             )
+            self._schedule_health_check(tool_name, self._poll_interval(tool_name))
             
             # 触发事件
             await self._emit_lifecycle_event(
@@ -146,7 +236,7 @@ class ToolLifecycleManager:
                 {"dependencies": dependencies, "metadata": metadata}
             )
             
-            self.logger.info(f"工具已注册: {tool_name}")
+            self.logger.info("工具已注册: %s", tool_name)
             
             # 自动初始化
             await self.initialize_tool(tool_name)
@@ -154,8 +244,8 @@ class ToolLifecycleManager:
             return True
             
         except Exception as e:
-            self.logger.error(f"注册工具失败: {tool_name}, 错误: {e}")
-            self._tool_states[tool_name] = ToolState.ERROR
+            self.logger.error("注册工具失败: %s, 错误: %s", tool_name, e)
+            self._set_state(tool_name, ToolState.ERROR)
             return False
     
     async def initialize_tool(self, tool_name: str) -> bool:
@@ -169,14 +259,14 @@ class ToolLifecycleManager:
             bool: 初始化是否成功
         """
         if tool_name not in self._tools:
-            self.logger.error(f"工具未注册: {tool_name}")
+            self.logger.error("工具未注册: %s", tool_name)
             return False
         
-        async with self._tool_locks[tool_name]:
+        async with self._get_tool_lock(tool_name):
             try:
                 # 更新状态
                 old_state = self._tool_states[tool_name]
-                self._tool_states[tool_name] = ToolState.INITIALIZING
+                self._set_state(tool_name, ToolState.INITIALIZING)
                 
                 await self._emit_lifecycle_event(
                     tool_name,
@@ -187,17 +277,17 @@ class ToolLifecycleManager:
                 
                 # 检查依赖
                 if not await self._check_dependencies(tool_name):
-                    self._tool_states[tool_name] = ToolState.ERROR
+                    self._set_state(tool_name, ToolState.ERROR)
                     return False
                 
                 # 执行初始化
-                tool = self._tools[tool_name]
-                if hasattr(tool, 'initialize'):
-                    await tool.initialize()
+                initialize = self._tool_slots[tool_name].initialize
+                if initialize is not None:
+                    await initialize()
                 
                 # 执行健康检查
                 if await self._perform_health_check(tool_name):
-                    self._tool_states[tool_name] = ToolState.READY
+                    self._set_state(tool_name, ToolState.READY)
                     
                     await self._emit_lifecycle_event(
                         tool_name,
@@ -206,15 +296,15 @@ class ToolLifecycleManager:
                         ToolState.READY
                     )
                     
-                    self.logger.info(f"工具初始化成功: {tool_name}")
+                    self.logger.info("工具初始化成功: %s", tool_name)
                     return True
                 else:
-                    self._tool_states[tool_name] = ToolState.ERROR
+                    self._set_state(tool_name, ToolState.ERROR)
                     return False
                 
             except Exception as e:
-                self.logger.error(f"工具初始化失败: {tool_name}, 错误: {e}")
-                self._tool_states[tool_name] = ToolState.ERROR
+                self.logger.error("工具初始化失败: %s, 错误: %s", tool_name, e)
+                self._set_state(tool_name, ToolState.ERROR)
                 
                 await self._emit_lifecycle_event(
                     tool_name,
@@ -237,23 +327,22 @@ class ToolLifecycleManager:
             bool: 卸载是否成功
         """
         if tool_name not in self._tools:
-            self.logger.warning(f"工具未注册: {tool_name}")
+            self.logger.warning("工具未注册: %s", tool_name)
             return True
         
-        async with self._tool_locks[tool_name]:
+        async with self._get_tool_lock(tool_name):
             try:
-                # 检查是否有其他工具依赖于此工具
-                if tool_name in self._reverse_dependencies:
-                    dependent_tools = self._reverse_dependencies[tool_name]
-                    if dependent_tools:
-                        self.logger.error(
-                            f"无法卸载工具 {tool_name}，以下工具依赖于它: {dependent_tools}"
-                        )
-                        return False
+                # 检查是否有其他工具依赖于此工具（间接依赖方只在拒绝卸载时才计算，用于提示）
+                if self._reverse_dependencies.get(tool_name):
+                    self.logger.error(
+                        "无法卸载工具 %s，以下工具依赖于它: %s",
+                        tool_name, self._get_reverse_closure(tool_name)
+                    )
+                    return False
                 
                 # 更新状态
                 old_state = self._tool_states[tool_name]
-                self._tool_states[tool_name] = ToolState.UNLOADING
+                self._set_state(tool_name, ToolState.UNLOADING)
                 
                 await self._emit_lifecycle_event(
                     tool_name,
@@ -263,15 +352,17 @@ class ToolLifecycleManager:
                 )
                 
                 # 执行清理
-                tool = self._tools[tool_name]
-                if hasattr(tool, 'cleanup'):
-                    await tool.cleanup()
+                cleanup = self._tool_slots[tool_name].cleanup
+                if cleanup is not None:
+                    await cleanup()
                 
                 # 清理数据
                 del self._tools[tool_name]
-                del self._tool_locks[tool_name]
-                self._tool_states[tool_name] = ToolState.UNLOADED
-                self._health_status.pop(tool_name, None)
+                self._tool_names_dirty = True
+                del self._tool_slots[tool_name]
+                self._tool_locks.pop(tool_name, None)
+                self._set_state(tool_name, ToolState.UNLOADED)
+                self._discard_health_status(tool_name)
                 self._tool_metadata.pop(tool_name, None)
                 
                 # 清理依赖关系
@@ -280,6 +371,7 @@ class ToolLifecycleManager:
                         if dep_name in self._reverse_dependencies:
                             self._reverse_dependencies[dep_name].discard(tool_name)
                     del self._tool_dependencies[tool_name]
+                    self._required_masks.pop(tool_name, None)
                 
                 if tool_name in self._reverse_dependencies:
                     del self._reverse_dependencies[tool_name]
@@ -291,26 +383,23 @@ class ToolLifecycleManager:
                     ToolState.UNLOADED
                 )
                 
-                self.logger.info(f"工具已卸载: {tool_name}")
+                self.logger.info("工具已卸载: %s", tool_name)
                 return True
                 
             except Exception as e:
-                self.logger.error(f"卸载工具失败: {tool_name}, 错误: {e}")
-                self._tool_states[tool_name] = ToolState.ERROR
+                self.logger.error("卸载工具失败: %s, 错误: %s", tool_name, e)
+                self._set_state(tool_name, ToolState.ERROR)
                 return False
     
-    async def get_tool_state(self, tool_name: str) -> Optional[ToolState]:
+    def get_tool_state(self, tool_name: str) -> Optional[ToolState]:
         """获取工具状态"""
         return self._tool_states.get(tool_name)
     
-    async def get_available_tools(self) -> List[str]:
+    def get_available_tools(self) -> List[str]:
         """获取可用工具列表"""
-        return [
-            name for name, state in self._tool_states.items()
-            if state == ToolState.READY
-        ]
+        return list(self._ready_tools)
     
-    async def get_tool_health(self, tool_name: str) -> Optional[ToolHealthStatus]:
+    def get_tool_health(self, tool_name: str) -> Optional[ToolHealthStatus]:
         """获取工具健康状态"""
         return self._health_status.get(tool_name)
     
@@ -333,30 +422,52 @@ class ToolLifecycleManager:
         
         self.logger.info("健康监控已停止")
     
+    async def close(self) -> None:
+        """停止健康监控，分发完已入队的生命周期事件后停止分发任务"""
+        await self.stop_health_monitoring()
+        
+        dispatcher_task = self._dispatcher_task
+        if dispatcher_task is None:
+            return
+        
+        if not dispatcher_task.done():
+            await self._event_bus.join()
+            dispatcher_task.cancel()
+        try:
+            await dispatcher_task
+        except asyncio.CancelledError:
+            pass
+        
+        self._dispatcher_task = None
+        self._event_bus = None
+    
     async def force_health_check(self, tool_name: Optional[str] = None) -> Dict[str, bool]:
-        """强制执行健康检查"""
+        """强制执行健康检查（最近_health_result_ttl秒内已检查过的工具直接返回上次结果）"""
         results = {}
         
         if tool_name:
             if tool_name in self._tools:
-                results[tool_name] = await self._perform_health_check(tool_name)
+                results[tool_name] = await self._perform_health_check(tool_name, use_cached=True)
         else:
-            for name in self._tools.keys():
-                results[name] = await self._perform_health_check(name)
+            names = self._tool_names()
+            checks = await asyncio.gather(
+                *(self._guarded_health_check(name, use_cached=True) for name in names)
+            )
+            results.update(zip(names, checks))
         
         return results
     
-    async def get_tool_dependencies(self, tool_name: str) -> Set[str]:
+    def get_tool_dependencies(self, tool_name: str) -> Set[str]:
         """获取工具依赖"""
         return self._tool_dependencies.get(tool_name, set())
     
-    async def get_dependent_tools(self, tool_name: str) -> Set[str]:
+    def get_dependent_tools(self, tool_name: str) -> Set[str]:
         """获取依赖此工具的其他工具"""
         return self._reverse_dependencies.get(tool_name, set())
     
-    def add_lifecycle_callback(self, callback: Callable[[ToolLifecycleEvent], None]) -> None:
-        """添加生命周期事件回调"""
-        self._event_callbacks.append(callback)
+    def add_lifecycle_callback(self, callback: Callable[[ToolLifecycleEvent], Any]) -> None:
+        """添加生命周期事件回调（支持普通函数和协程函数，由后台分发任务调用）"""
+        self._event_callbacks = self._event_callbacks + (callback,)
     
     def get_lifecycle_events(
         self,
@@ -364,122 +475,294 @@ class ToolLifecycleManager:
         event_type: Optional[str] = None,
         limit: Optional[int] = None
     ) -> List[ToolLifecycleEvent]:
-        """获取生命周期事件"""
-        events = self._lifecycle_events
-        
+        """获取生命周期事件（按发生顺序排列）"""
+        # 有条件时从对应的索引取事件，只在较小的索引上做剩余的过滤
         if tool_name:
-            events = [e for e in events if e.tool_name == tool_name]
-        
-        if event_type:
-            events = [e for e in events if e.event_type == event_type]
+            source = self._events_by_tool.get(tool_name, ())
+        elif event_type:
+            source = self._events_by_type.get(event_type, ())
+        else:
+            source = self._lifecycle_events
         
-        if limit:
-            events = events[-limit:]
+        if not limit:
+            if tool_name and event_type:
+                return [e for e in source if e.event_type == event_type]
+            return list(source)
         
-        return events
+        # 从最新的事件往前取，凑够limit条即停止
+        events: Iterable[ToolLifecycleEvent] = reversed(source)
+        if tool_name and event_type:
+            events = (e for e in events if e.event_type == event_type)
+        latest = list(islice(events, limit))
+        latest.reverse()
+        return latest
+    
+    def _tool_names(self) -> Tuple[str, ...]:
+        """获取已注册工具名的快照（可在await期间安全遍历）"""
+        if self._tool_names_dirty:
+            self._tool_names_snapshot = tuple(self._tools)
+            self._tool_names_dirty = False
+        return self._tool_names_snapshot
+    
+    def _get_tool_lock(self, tool_name: str) -> asyncio.Lock:
+        """获取工具的锁，不存在时创建"""
+        lock = self._tool_locks.get(tool_name)
+        if lock is None:
+            lock = self._tool_locks[tool_name] = asyncio.Lock()
+        return lock
+    
+    def _tool_bit(self, tool_name: str) -> int:
+        """获取工具名对应的位，首次出现时分配"""
+        bit = self._tool_bits.get(tool_name)
+        if bit is None:
+            bit = self._tool_bits[tool_name] = 1 << len(self._tool_bits)
+        return bit
+    
+    def _set_state(self, tool_name: str, new_state: ToolState) -> None:
+        """更新工具状态，并同步维护按状态索引的工具名和健康状态记录中的状态"""
+        old_state = self._tool_states.get(tool_name)
+        if old_state is not None:
+            self._tools_by_state[old_state].pop(tool_name, None)
+        self._tools_by_state[new_state][tool_name] = None
+        self._tool_states[tool_name] = new_state
+        if new_state is ToolState.READY:
+            self._ready_mask |= self._tool_bit(tool_name)
+        else:
+            self._ready_mask &= ~self._tool_bit(tool_name)
+        health_status = self._health_status.get(tool_name)
+        if health_status is not None:
+            health_status.state = new_state
+    
+    def _discard_health_status(self, tool_name: str) -> None:
+        """移除工具的健康状态记录，并从总计数中扣除其检查次数"""
+        health_status = self._health_status.pop(tool_name, None)
+        if health_status is not None:
+            self._total_success -= health_status.success_count
+            self._total_errors -= health_status.error_count
+    
+    def _get_reverse_closure(self, tool_name: str) -> Set[str]:
+        """获取直接或间接依赖此工具的所有工具"""
+        found: Set[str] = set()
+        stack = list(self._reverse_dependencies.get(tool_name, ()))
+        while stack:
+            dependent = stack.pop()
+            if dependent not in found:
+                found.add(dependent)
+                stack.extend(self._reverse_dependencies.get(dependent, ()))
+        return found
+    
+    def _creates_dependency_cycle(self, tool_name: str, dependencies: List[str]) -> bool:
+        """检查为工具添加这些依赖后，依赖图中是否会出现回到该工具的环"""
+        stack = list(dependencies)
+        visited: Set[str] = set()
+        while stack:
+            dep_name = stack.pop()
+            if dep_name == tool_name:
+                return True
+            if dep_name in visited:
+                continue
+            visited.add(dep_name)
+            stack.extend(self._tool_dependencies.get(dep_name, ()))
+        return False
     
     async def _check_dependencies(self, tool_name: str) -> bool:
         """检查工具依赖"""
-        dependencies = self._tool_dependencies.get(tool_name, set())
+        # 常见情况：没有依赖或依赖全部就绪，一次位运算即可判断
+        required_mask = self._required_masks.get(tool_name, 0)
+        if (self._ready_mask & required_mask) == required_mask:
+            return True
         
-        for dep_name in dependencies:
+        # 依赖未满足时再逐个定位原因用于日志
+        for dep_name in self._tool_dependencies[tool_name]:
             if dep_name not in self._tools:
-                self.logger.error(f"依赖的工具未注册: {dep_name}")
+                self.logger.error("依赖的工具未注册: %s", dep_name)
                 return False
             
             if self._tool_states.get(dep_name) != ToolState.READY:
-                self.logger.error(f"依赖的工具未就绪: {dep_name}")
+                self.logger.error("依赖的工具未就绪: %s", dep_name)
                 return False
         
         return True
     
-    async def _perform_health_check(self, tool_name: str) -> bool:
-        """执行健康检查"""
+    async def _perform_health_check(self, tool_name: str, use_cached: bool = False) -> bool:
+        """
+        执行健康检查
+        
+        Args:
+            tool_name: 工具名称
+            use_cached: 最近一次检查结果仍在有效期内时直接返回，不再探测工具
+        """
         if tool_name not in self._tools:
             return False
         
+        if use_cached:
+            health_status = self._health_status.get(tool_name)
+            if (health_status is not None
+                    and time.monotonic() - health_status._last_result_at < self._health_result_ttl):
+                return health_status._last_result
+        
         try:
-            start_time = time.time()
-            tool = self._tools[tool_name]
+            start_time = time.monotonic()
+            health_check = self._tool_slots[tool_name].health_check
             
             # 执行健康检查
             is_healthy = True
-            if hasattr(tool, 'health_check'):
-                is_healthy = await tool.health_check()
+            if health_check is not None:
+                is_healthy = await health_check()
             
-            response_time = time.time() - start_time
+            finished_at = time.monotonic()
+            response_time = finished_at - start_time
+            # 本次检查的时间戳，健康状态和生命周期事件共用
+            now = datetime.now()
             
             # 更新健康状态
             health_status = self._health_status[tool_name]
-            health_status.last_check_time = datetime.now()
+            health_status.last_check_time = now
             health_status.response_time = response_time
+            health_status._last_result = is_healthy
+            health_status._last_result_at = finished_at
             
             if is_healthy:
                 health_status.success_count += 1
+                self._total_success += 1
                 if self._tool_states[tool_name] == ToolState.ERROR:
                     # 从错误状态恢复
-                    self._tool_states[tool_name] = ToolState.READY
+                    self._set_state(tool_name, ToolState.READY)
                     await self._emit_lifecycle_event(
                         tool_name,
                         "tool_recovered",
                         ToolState.ERROR,
-                        ToolState.READY
+                        ToolState.READY,
+                        timestamp=now
                     )
             else:
                 health_status.error_count += 1
+                self._total_errors += 1
                 health_status.last_error = "健康检查失败"
                 
                 if self._tool_states[tool_name] == ToolState.READY:
-                    self._tool_states[tool_name] = ToolState.UNAVAILABLE
+                    self._set_state(tool_name, ToolState.UNAVAILABLE)
                     await self._emit_lifecycle_event(
                         tool_name,
                         "tool_unhealthy",
                         ToolState.READY,
-                        ToolState.UNAVAILABLE
+                        ToolState.UNAVAILABLE,
+                        timestamp=now
                     )
             
-            health_status.state = self._tool_states[tool_name]
+            self._reschedule_after_check(tool_name, health_status, is_healthy)
             return is_healthy
             
         except Exception as e:
-            self.logger.error(f"健康检查失败: {tool_name}, 错误: {e}")
+            self.logger.error("健康检查失败: %s, 错误: %s", tool_name, e)
             
             # 更新健康状态
             health_status = self._health_status[tool_name]
             health_status.error_count += 1
+            self._total_errors += 1
             health_status.last_error = str(e)
-            health_status.last_check_time = datetime.now()
+            health_status._last_result = False
+            health_status._last_result_at = time.monotonic()
+            now = datetime.now()
+            health_status.last_check_time = now
             
             # 更新工具状态
             old_state = self._tool_states[tool_name]
-            self._tool_states[tool_name] = ToolState.ERROR
-            health_status.state = ToolState.ERROR
+            self._set_state(tool_name, ToolState.ERROR)
+            self._reschedule_after_check(tool_name, health_status, False)
             
             await self._emit_lifecycle_event(
                 tool_name,
                 "tool_health_check_failed",
                 old_state,
                 ToolState.ERROR,
-                {"error": str(e)}
+                {"error": str(e)},
+                timestamp=now
             )
             
             return False
     
+    async def _guarded_health_check(self, tool_name: str, use_cached: bool = False) -> bool:
+        """在并发上限内执行健康检查"""
+        if self._health_sem is None:
+            self._health_sem = asyncio.Semaphore(self._health_check_concurrency)
+        async with self._health_sem:
+            return await self._perform_health_check(tool_name, use_cached)
+    
+    def _poll_interval(self, tool_name: str) -> float:
+        """获取工具的基础检查间隔（注册元数据中的poll_interval优先，如本地工具可设置更短的间隔）"""
+        return self._tool_metadata.get(tool_name, {}).get('poll_interval', self._health_check_interval)
+    
+    def _schedule_health_check(self, tool_name: str, delay: float) -> None:
+        """安排工具在delay秒后进行下一次周期性健康检查"""
+        health_status = self._health_status[tool_name]
+        health_status.next_check_at = time.monotonic() + delay
+        heapq.heappush(self._health_schedule, (health_status.next_check_at, tool_name))
+        
+        # 新条目成为堆顶时唤醒健康检查循环重新计算等待时间
+        if self._schedule_event is not None and self._health_schedule[0][1] == tool_name:
+            self._schedule_event.set()
+    
+    def _reschedule_after_check(self, tool_name: str, health_status: ToolHealthStatus, is_healthy: bool) -> None:
+        """根据检查结果调整退避倍数并安排下一次检查"""
+        if is_healthy:
+            health_status.backoff = 1.0
+        else:
+            health_status.backoff = min(health_status.backoff * 2, self._MAX_HEALTH_BACKOFF)
+        self._schedule_health_check(tool_name, self._poll_interval(tool_name) * health_status.backoff)
+    
+    def _pop_due_health_checks(self) -> List[str]:
+        """从调度堆中取出已到期且处于可检查状态的工具"""
+        now = time.monotonic()
+        schedule = self._health_schedule
+        due = []
+        while schedule and schedule[0][0] <= now:
+            check_at, tool_name = heapq.heappop(schedule)
+            health_status = self._health_status.get(tool_name)
+            if health_status is None or health_status.next_check_at != check_at:
+                continue
+            
+            if self._tool_states.get(tool_name) in _CHECKABLE_STATES:
+                due.append(tool_name)
+            else:
+                # 初始化/卸载中的工具本轮跳过，按基础间隔稍后再检查
+                self._schedule_health_check(tool_name, self._poll_interval(tool_name))
+        return due
+    
     async def _health_check_loop(self) -> None:
-        """健康检查循环"""
+        """健康检查循环：按各工具的下次检查时间调度"""
+        self._schedule_event = asyncio.Event()
         while True:
             try:
-                await asyncio.sleep(self._health_check_interval)
+                if self._health_schedule:
+                    delay = self._health_schedule[0][0] - time.monotonic()
+                else:
+                    delay = self._health_check_interval
                 
-                # 对所有工具执行健康检查
-                for tool_name in list(self._tools.keys()):
-                    if self._tool_states.get(tool_name) in [ToolState.READY, ToolState.UNAVAILABLE, ToolState.ERROR]:
-                        await self._perform_health_check(tool_name)
+                if delay > 0:
+                    # 等到最早的检查到期，期间有更早的检查加入时提前醒来
+                    self._schedule_event.clear()
+                    try:
+                        async with timeout_after(delay):
+                            await self._schedule_event.wait()
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                # 并发地对到期的工具执行健康检查，单个慢工具不会拖慢其他工具
+                candidates = self._pop_due_health_checks()
+                results = await asyncio.gather(
+                    *(self._guarded_health_check(name) for name in candidates),
+                    return_exceptions=True
+                )
+                for name, result in zip(candidates, results):
+                    if isinstance(result, Exception):
+                        self.logger.error("健康检查异常: %s, 错误: %s", name, result)
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                self.logger.error(f"健康检查循环异常: {e}")
+                self.logger.error("健康检查循环异常: %s", e)
     
     async def _emit_lifecycle_event(
         self,
@@ -487,41 +770,64 @@ class ToolLifecycleManager:
         event_type: str,
         old_state: Optional[ToolState],
         new_state: ToolState,
-        data: Optional[Dict[str, Any]] = None
+        data: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None
     ) -> None:
-        """发出生命周期事件"""
+        """发出生命周期事件（调用方已取得当前时间时可通过timestamp传入）"""
         event = ToolLifecycleEvent(
             tool_name=tool_name,
             event_type=event_type,
-            timestamp=datetime.now(),
+            timestamp=timestamp or datetime.now(),
             old_state=old_state,
             new_state=new_state,
             data=data
         )
         
-        # 保存事件
+        # 保存事件（deque的maxlen负责淘汰旧事件）
         self._lifecycle_events.append(event)
+        self._events_by_tool[tool_name].append(event)
+        self._events_by_type[event_type].append(event)
         
-        # 限制事件历史长度
-        if len(self._lifecycle_events) > 1000:
-            self._lifecycle_events = self._lifecycle_events[-500:]
-        
-        # 触发回调
-        for callback in self._event_callbacks:
-            try:
-                callback(event)
-            except Exception as e:
-                self.logger.error(f"生命周期事件回调失败: {e}")
+        # 交给分发任务触发回调，不在持有工具锁的调用方中执行用户代码
+        if self._event_callbacks:
+            if self._dispatcher_task is None or self._dispatcher_task.done():
+                self._event_bus = asyncio.Queue()
+                self._dispatcher_task = asyncio.create_task(self._dispatch_loop(self._event_bus))
+            self._event_bus.put_nowait(event)
         
-        self.logger.debug(f"生命周期事件: {tool_name} - {event_type}")
+        self.logger.debug("生命周期事件: %s - %s", tool_name, event_type)
+    
+    async def _dispatch_loop(self, event_bus: asyncio.Queue) -> None:
+        """生命周期事件分发循环：批量取出已入队的事件并依次触发回调"""
+        while True:
+            batch = [await event_bus.get()]
+            while len(batch) < self._DISPATCH_BATCH_SIZE and not event_bus.empty():
+                batch.append(event_bus.get_nowait())
+            
+            for event in batch:
+                pending = []
+                for callback in self._event_callbacks:
+                    try:
+                        result = callback(event)
+                        if inspect.isawaitable(result):
+                            pending.append(result)
+                    except Exception as e:
+                        self.logger.error("生命周期事件回调失败: %s", e)
+                
+                if pending:
+                    for result in await asyncio.gather(*pending, return_exceptions=True):
+                        if isinstance(result, Exception):
+                            self.logger.error("生命周期事件回调失败: %s", result)
+            
+            for _ in batch:
+                event_bus.task_done()
+            
+            # 每批之间让出事件循环
+            await asyncio.sleep(0)
     
     def get_lifecycle_statistics(self) -> Dict[str, Any]:
         """获取生命周期统计"""
-        tool_states = {}
-        for state in ToolState:
-            tool_states[state.value] = len([
-                name for name, s in self._tool_states.items() if s == state
-            ])
+        tool_states = {state.value: len(self._tools_by_state[state]) for state in ToolState}
         
         health_summary = {
             'total_tools': len(self._tools),
@@ -529,13 +835,8 @@ class ToolLifecycleManager:
                 name for name, status in self._health_status.items()
                 if status.state == ToolState.READY
             ]),
-            'total_health_checks': sum(
-                status.success_count + status.error_count
-                for status in self._health_status.values()
-            ),
-            'total_errors': sum(
-                status.error_count for status in self._health_status.values()
-            )
+            'total_health_checks': self._total_success + self._total_errors,
+            'total_errors': self._total_errors
         }
         
         return {
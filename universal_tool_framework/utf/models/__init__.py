@@ -4,7 +4,7 @@
 包含框架中使用的所有数据模型和类型定义
 """
 
-from ..models.task import Task, TodoItem, TaskStatus, TaskResult, TaskComplexity
+from ..models.task import Task, TodoItem, TaskStatus, TaskResult, TaskResultBatch, TaskComplexity
 from ..models.tool import Tool, ToolResult, ToolCall, ToolDefinition
 from ..models.execution import ExecutionPlan, ExecutionResult, ExecutionContext
 
@@ -13,6 +13,7 @@ __all__ = [
     "TodoItem", 
     "TaskStatus",
     "TaskResult",
+    "TaskResultBatch",
     "TaskComplexity",
     "Tool",
     "ToolResult",
@@ -2,12 +2,14 @@
 执行相关的数据模型
 """
 
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional, Set
 from datetime import datetime
 from pydantic import BaseModel, Field
 
 from ..models.tool import ToolCall, ToolResult
+from ..utils.dataclass_ext import DATACLASS_SLOTS
 
 
 class ExecutionStrategy(str, Enum):
@@ -141,20 +143,26 @@ class ExecutionResult(BaseModel):
         self.error_message = error_message
 
 
-class UserInteractionEvent(BaseModel):
-    """用户交互事件"""
-    id: str = Field(..., description="事件ID")
-    type: str = Field(..., description="事件类型")
-    data: Any = Field(..., description="事件数据")
-    task_id: str = Field(..., description="关联任务ID")
-    timestamp: datetime = Field(default_factory=datetime.now, description="时间戳")
-    response_required: bool = Field(default=False, description="是否需要用户响应")
-    timeout_seconds: Optional[int] = Field(None, description="超时时间")
-
-
-class UserInteractionResponse(BaseModel):
+@dataclass(**DATACLASS_SLOTS)
+class UserInteractionEvent:
+    """
+    用户交互事件
+    
+    进度和通知会频繁创建事件，使用slots dataclass而非Pydantic模型以减小单个事件的开销
+    """
+    id: str  # 事件ID
+    type: str  # 事件类型
+    data: Any  # 事件数据
+    task_id: str  # 关联任务ID
+    timestamp: datetime = field(default_factory=datetime.now)  # 时间戳
+    response_required: bool = False  # 是否需要用户响应
+    timeout_seconds: Optional[int] = None  # 超时时间
+
+
+@dataclass(**DATACLASS_SLOTS)
+class UserInteractionResponse:
     """用户交互响应"""
-    event_id: str = Field(..., description="对应的事件ID")
-    action: str = Field(..., description="用户选择的动作")
-    data: Optional[Dict[str, Any]] = Field(None, description="响应数据")
-    timestamp: datetime = Field(default_factory=datetime.now, description="响应时间")
+    event_id: str  # 对应的事件ID
+    action: str  # 用户选择的动作
+    data: Optional[Dict[str, Any]] = None  # 响应数据
+    timestamp: datetime = field(default_factory=datetime.now)  # 响应时间
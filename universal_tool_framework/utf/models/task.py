@@ -2,10 +2,14 @@
 任务相关的数据模型
 """
 
+import heapq
+from dataclasses import dataclass, field, fields, is_dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from ..utils.dataclass_ext import DATACLASS_SLOTS
 
 
 class TaskStatus(str, Enum):
@@ -24,6 +28,7 @@ class TaskComplexity(BaseModel):
     estimated_steps: int = Field(..., ge=1, description="预估步骤数")
     required_tools: List[str] = Field(default=[], description="需要的工具类型")
     reasoning: str = Field(..., description="复杂度分析原因")
+    task_type: Optional[str] = Field(None, description="任务类型(由规则分析得出，分解时据此选择模板)")
 
 
 class TodoItem(BaseModel):
@@ -83,6 +88,12 @@ class Task(BaseModel):
     completed_at: Optional[datetime] = Field(None, description="完成时间")
     metadata: Dict[str, Any] = Field(default={}, description="任务元数据")
 
+    # 就绪队列: (-priority, seq, TodoItem) 小顶堆，配合未满足依赖计数实现O(log N)调度
+    _ready_heap: List[Tuple[int, int, TodoItem]] = PrivateAttr(default_factory=list)
+    _unmet_deps: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _dependents: Dict[str, List[TodoItem]] = PrivateAttr(default_factory=dict)
+    _ready_seq: int = PrivateAttr(default=0)
+
     @property
     def pending_todos(self) -> List[TodoItem]:
         """获取待执行的TodoItem"""
@@ -114,6 +125,48 @@ class Task(BaseModel):
         ready_todos.sort(key=lambda x: x.priority, reverse=True)
         return ready_todos
 
+    def init_ready_queue(self) -> None:
+        """根据当前TodoList重建就绪队列和依赖计数"""
+        completed_ids = {todo.id for todo in self.todo_list if todo.status == TaskStatus.COMPLETED}
+        self._ready_heap = []
+        self._unmet_deps = {}
+        self._dependents = {}
+        self._ready_seq = 0
+        
+        for todo in self.todo_list:
+            if todo.status != TaskStatus.PENDING:
+                continue
+            unmet = {dep_id for dep_id in todo.dependencies if dep_id not in completed_ids}
+            self._unmet_deps[todo.id] = len(unmet)
+            for dep_id in unmet:
+                self._dependents.setdefault(dep_id, []).append(todo)
+            if not unmet:
+                self._push_ready(todo)
+
+    def pop_ready_todo(self) -> Optional[TodoItem]:
+        """弹出优先级最高的可执行TodoItem，没有时返回None"""
+        while self._ready_heap:
+            todo = heapq.heappop(self._ready_heap)[2]
+            # 跳过在入队后状态已变化的条目
+            if todo.status == TaskStatus.PENDING:
+                return todo
+        return None
+
+    def complete_todo(self, todo: TodoItem) -> None:
+        """标记TodoItem完成，并将依赖已全部满足的后续TodoItem加入就绪队列"""
+        todo.mark_completed()
+        
+        for dependent in self._dependents.pop(todo.id, ()):
+            remaining = self._unmet_deps[dependent.id] - 1
+            self._unmet_deps[dependent.id] = remaining
+            if remaining == 0 and dependent.status == TaskStatus.PENDING:
+                self._push_ready(dependent)
+
+    def _push_ready(self, todo: TodoItem) -> None:
+        """将TodoItem加入就绪队列"""
+        heapq.heappush(self._ready_heap, (-todo.priority, self._ready_seq, todo))
+        self._ready_seq += 1
+
     def update_status(self) -> None:
         """根据TodoList状态更新整体任务状态"""
         if not self.todo_list:
@@ -131,16 +184,58 @@ class Task(BaseModel):
                 self.started_at = datetime.now()
 
 
-class TaskResult(BaseModel):
-    """任务执行结果"""
-    type: str = Field(..., description="结果类型")
-    data: Any = Field(..., description="结果数据")
-    task_id: Optional[str] = Field(None, description="关联的任务ID")
-    todo_id: Optional[str] = Field(None, description="关联的TodoItem ID")
-    timestamp: datetime = Field(default_factory=datetime.now, description="时间戳")
-    metadata: Dict[str, Any] = Field(default={}, description="额外元数据")
+@dataclass(**DATACLASS_SLOTS)
+class TaskResult:
+    """
+    任务执行结果
+    
+    执行过程中高频产生，使用dataclass而非Pydantic模型以避免逐字段校验的开销
+    """
+    type: str  # 结果类型
+    data: Any  # 结果数据(dict或产出后不再变更的BaseModel，序列化延迟到读取data_dict时)
+    task_id: Optional[str] = None  # 关联的任务ID
+    todo_id: Optional[str] = None  # 关联的TodoItem ID
+    timestamp: datetime = field(default_factory=datetime.now)  # 时间戳
+    metadata: Dict[str, Any] = field(default_factory=dict)  # 额外元数据
+    _data_dict: Any = field(default=None, init=False, repr=False, compare=False)
 
-    class Config:
-        """Pydantic配置"""
-        use_enum_values = True
-        extra = "allow"
+    @property
+    def data_dict(self) -> Any:
+        """获取序列化后的结果数据（首次访问时才执行model_dump并缓存）"""
+        if self._data_dict is None:
+            self._data_dict = _dump_payload(self.data)
+        return self._data_dict
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "type": self.type,
+            "data": self.data_dict,
+            "task_id": self.task_id,
+            "todo_id": self.todo_id,
+            "timestamp": self.timestamp,
+            "metadata": self.metadata,
+        }
+
+
+@dataclass(**DATACLASS_SLOTS)
+class TaskResultBatch:
+    """批量输出的任务执行结果"""
+    results: List[TaskResult] = field(default_factory=list)  # 按产生顺序排列的结果
+    type: str = "result_batch"  # 结果类型，便于与TaskResult统一按type分派
+
+
+def _dump_payload(value: Any) -> Any:
+    """递归地将payload中的BaseModel和dataclass转换为dict"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if is_dataclass(value) and not isinstance(value, type):
+        return {
+            item.name: _dump_payload(getattr(value, item.name))
+            for item in fields(value) if item.init
+        }
+    if isinstance(value, dict):
+        return {key: _dump_payload(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_dump_payload(item) for item in value]
+    return value
@@ -0,0 +1,43 @@
+"""
+异步扩展工具
+"""
+
+import asyncio
+import contextvars
+import functools
+import sys
+from typing import Any, Callable, TypeVar
+
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as timeout_after
+else:
+    from async_timeout import timeout as timeout_after
+
+T = TypeVar("T")
+
+
+async def to_thread_fast(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """
+    在默认线程池中执行阻塞函数
+    
+    与asyncio.to_thread行为一致。仍会调用copy_context()判断上下文是否为空；
+    没有任何ContextVar时省去functools.partial(ctx.run, ...)包装和线程中的ctx.run，
+    直接将函数提交到线程池
+    
+    Args:
+        func: 要执行的阻塞函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+        
+    Returns:
+        T: 函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    if not ctx:
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        return await loop.run_in_executor(None, func, *args)
+    return await loop.run_in_executor(
+        None, functools.partial(ctx.run, func, *args, **kwargs)
+    )
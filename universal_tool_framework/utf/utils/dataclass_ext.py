@@ -0,0 +1,10 @@
+"""
+dataclass扩展工具
+"""
+
+import sys
+from typing import Any, Dict
+
+
+# Python 3.10+ 的dataclass支持slots，旧版本退化为普通dataclass
+DATACLASS_SLOTS: Dict[str, Any] = {'slots': True} if sys.version_info >= (3, 10) else {}
@@ -0,0 +1,35 @@
+"""
+ID生成工具
+"""
+
+import itertools
+import os
+import secrets
+
+
+# 进程级随机前缀 + 单调计数器：进程内唯一，跨进程碰撞概率可忽略
+_id_prefix = secrets.token_hex(8)
+_id_counter = itertools.count()
+
+
+def _reseed() -> None:
+    """重新生成前缀并重置计数器（fork出的子进程会继承父进程的前缀和计数器）"""
+    global _id_prefix, _id_counter
+    _id_prefix = secrets.token_hex(8)
+    _id_counter = itertools.count()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def new_id() -> str:
+    """
+    生成进程内唯一的ID
+    
+    相比uuid4()不需要每次读取os.urandom，适用于任务、TodoItem、交互事件等内部ID
+    
+    Returns:
+        str: 形如"<16位十六进制前缀>-<十六进制序号>"的ID
+    """
+    return f"{_id_prefix}-{next(_id_counter):x}"
@@ -5,13 +5,15 @@
 import logging
 import logging.handlers
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from pathlib import Path
 
-from ..config.settings import LoggingConfig
+if TYPE_CHECKING:
+    # 仅用于类型标注：utils不在运行时依赖config，models等底层模块可以直接引用utils
+    from ..config.settings import LoggingConfig
 
 
-def setup_logging(config: LoggingConfig) -> None:
+def setup_logging(config: "LoggingConfig") -> None:
     """
     设置日志系统
     